@@ -0,0 +1,109 @@
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from src.model import LOAD_COLUMNS, NBAOracle, train_and_evaluate
+from src.pipeline import feature_pipeline
+from src.profiling import REPORTS_DIR, RunProfiler, stage
+from src.synthetic import SEASON_START, synthetic_games
+
+# Every pipeline stage, the walk-forward training and the prediction paths on synthetic
+# leagues of growing history (6 seasons ~ the real data). Each size runs in its own process,
+# so peak RSS is per size. Results go to reports/scaling_<time>.csv and are compared with
+# benchmarks/baseline.csv (written on the first run or with --save-baseline).
+# Run from the project root:
+#   python benchmarks/scaling.py [seasons ...] [--no-train] [--save-baseline]
+
+SEASONS = [6, 24, 60]
+LAST_SEASON = 2024
+BASELINE_FILE = os.path.join('benchmarks', 'baseline.csv')
+PREDICT_REPEATS = 50
+
+
+def run_size(n_seasons, train=True):
+    with tempfile.TemporaryDirectory() as tmp, RunProfiler() as profiler:
+        with stage('generate') as stats:
+            games = synthetic_games(n_seasons=n_seasons, last_season=LAST_SEASON)
+            games.to_csv(os.path.join(tmp, 'nba_games_2019_2025.csv'), index=False)
+            stats['rows'] = len(games)
+        del games
+
+        df = feature_pipeline(base_dir=tmp).run(force=True, verbose=False)[LOAD_COLUMNS]
+
+        if train:
+            # Walk-forward over the last season only, so the number of folds stays the same
+            # and only the training history grows
+            with stage('train', rows=len(df)):
+                cons_models, chaos_models, _ = train_and_evaluate(df, start_date=f'{LAST_SEASON}-{SEASON_START}',
+                                                                  early_stopping=True)
+        else:
+            # Only the latest weekly fold on the full history, i.e. the cost of a weekly refresh
+            with stage('train_last_fold', rows=len(df)):
+                cons_models, chaos_models, _ = train_and_evaluate(
+                    df, start_date=df['GAME_DATE'].max() - pd.Timedelta(days=7), early_stopping=True)
+
+        with stage('build_oracle', rows=len(df)):
+            oracle = NBAOracle(df, cons_models, chaos_models)
+
+        teams = sorted(oracle.index)
+        as_of = df['GAME_DATE'].max() + pd.Timedelta(days=1)
+        with stage('predict_one', rows=PREDICT_REPEATS):
+            for home, away in itertools.islice(itertools.cycle(itertools.permutations(teams, 2)), PREDICT_REPEATS):
+                oracle.predict_many([(home, away)], as_of=as_of)
+        with stage('predict_slate') as stats:
+            stats['rows'] = len(oracle.predict_many(itertools.permutations(teams, 2), as_of=as_of))
+
+    return profiler.report().assign(seasons=n_seasons, games=len(df))
+
+
+def compare(report, baseline):
+    # Wall time of every (seasons, stage) relative to the baseline, >1 is slower
+    keys = ['seasons', 'stage']
+    merged = report.merge(baseline[keys + ['wall_s', 'peak_rss_mb']], on=keys, how='left', suffixes=('', '_base'))
+    merged['wall_vs_base'] = merged['wall_s'] / merged['wall_s_base']
+    merged['rss_vs_base'] = merged['peak_rss_mb'] / merged['peak_rss_mb_base']
+    return merged
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    seasons = [int(arg) for arg in args] or SEASONS
+    train = '--no-train' not in sys.argv
+
+    reports = []
+    for n_seasons in seasons:
+        start = time.perf_counter()
+        # Fresh process per size: peak RSS would otherwise carry over from the previous size
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            reports.append(pool.submit(run_size, n_seasons, train).result())
+        print(f'{n_seasons} seasons done in {time.perf_counter() - start:.1f}s')
+    report = pd.concat(reports, ignore_index=True)
+    columns = ['seasons', 'games', 'stage', 'rows', 'wall_s', 'cpu_s', 'peak_rss_mb']
+    # Per-fold records are in the run's own profile, the baseline keeps the stage totals
+    report = report[~report['stage'].isin(['fold', 'fold_fit'])]
+    report = report[[c for c in columns if c in report.columns]]
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    out_file = os.path.join(REPORTS_DIR, f"scaling_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    report.to_csv(out_file, index=False)
+
+    if os.path.exists(BASELINE_FILE) and '--save-baseline' not in sys.argv:
+        result = compare(report, pd.read_csv(BASELINE_FILE))
+        print(result[columns[:3] + ['wall_s', 'wall_vs_base', 'peak_rss_mb', 'rss_vs_base']].to_string(
+            index=False, float_format='{:.3f}'.format))
+    else:
+        report.to_csv(BASELINE_FILE, index=False)
+        print(report.to_string(index=False, float_format='{:.3f}'.format))
+        print(f'Baseline written to {BASELINE_FILE}')
+    print(f'Report: {out_file}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.artifacts import load_artifacts
+from src.service import PredictionService
+
+# Latency of the prediction service under many concurrent keep-alive clients, with
+# micro-batching and with one predict call per request (max_batch=1).
+# Needs saved models (run main.py once). Run from the project root:
+#   python benchmarks/service_load.py [clients] [requests per client]
+
+MATCHUPS = ['home=bos&away=mia', 'home=lal&away=gsw', 'home=Knicks&away=76ers', 'home=denver&away=PHX',
+            'home=OKC&away=San Antonio Spurs', 'home=blazers&away=utah&date=2025-01-15']
+
+
+async def client(port, n_requests, latencies, offset):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for i in range(n_requests):
+        query = MATCHUPS[(offset + i) % len(MATCHUPS)].replace(' ', '%20')
+        start = time.perf_counter()
+        writer.write(f'GET /predict?{query} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+        await writer.drain()
+
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            if line.lower().startswith(b'content-length'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run(oracle, clients, n_requests, window_ms, max_batch, port):
+    service = PredictionService(oracle, window_ms=window_ms, max_batch=max_batch)
+    server = await service.start(port=port)
+    latencies = []
+    start = time.perf_counter()
+    async with server:
+        await asyncio.gather(*(client(port, n_requests, latencies, i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        'requests': len(ms), 'batches': service.batcher.batches, 'req_per_s': len(ms) / elapsed,
+        'p50_ms': np.percentile(ms, 50), 'p99_ms': np.percentile(ms, 99),
+    }
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    loaded = load_artifacts()
+    if loaded is None:
+        print('No saved models matching the current features, run main.py first.')
+        return
+    oracle, _ = loaded
+
+    print(f'{clients} concurrent clients x {n_requests} requests')
+    for name, window_ms, max_batch in [('one call per request', 0.0, 1), ('micro-batched 2 ms', 2.0, 1024)]:
+        stats = asyncio.run(run(oracle, clients, n_requests, window_ms, max_batch, port=8765))
+        print(f"{name:>22}: {stats['requests']} requests in {stats['batches']} batches, "
+              f"{stats['req_per_s']:.0f} req/s, p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
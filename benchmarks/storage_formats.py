@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from src.model import LOAD_COLUMNS
+from src.storage import HAS_PARQUET
+
+# Compares the old CSV round trip with the Parquet intermediates on the widest frame.
+# Run from the project root: python benchmarks/storage_formats.py
+
+
+def timed(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def read_csv_like_before(path, columns=None):
+    df = pd.read_csv(path, usecols=columns)
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    return df.sort_values(['GAME_DATE', 'GAME_ID']).reset_index(drop=True)
+
+
+def main():
+    if not HAS_PARQUET:
+        print('pyarrow is not installed, nothing to compare.')
+        return
+
+    df = read_csv_like_before(os.path.join('data', 'nba_features_with_rolling.csv'))
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'frame.csv')
+        parquet_path = os.path.join(tmp, 'frame.parquet')
+
+        save_csv, _ = timed(lambda: df.to_csv(csv_path, index=False))
+        save_parquet, _ = timed(lambda: df.to_parquet(parquet_path, index=False))
+
+        load_csv, _ = timed(lambda: read_csv_like_before(csv_path))
+        load_parquet, _ = timed(lambda: pd.read_parquet(parquet_path))
+        proj_csv, _ = timed(lambda: read_csv_like_before(csv_path, LOAD_COLUMNS))
+        proj_parquet, _ = timed(lambda: pd.read_parquet(parquet_path, columns=LOAD_COLUMNS))
+
+        rows.append(['csv', save_csv, load_csv, proj_csv, os.path.getsize(csv_path)])
+        rows.append(['parquet', save_parquet, load_parquet, proj_parquet, os.path.getsize(parquet_path)])
+
+    report = pd.DataFrame(rows, columns=['format', 'save_s', 'load_s', 'load_projected_s', 'bytes'])
+    print(f'{len(df)} rows x {len(df.columns)} columns, projected read = {len(LOAD_COLUMNS)} columns')
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,86 @@
 import os
 import sys
 
+import pandas as pd
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 os.chdir(SCRIPT_DIR)
 
 from src.data_scraper import scrape_raw_data
-from src.data_engineering import load_and_process_data
-from src.elo_model import elo_model
-from src.rolling_stats import add_rolling_stats
-from src.model import load_data, train_and_evaluate, NBAOracle
+from src.pipeline import feature_pipeline
+from src.model import train_and_evaluate, NBAOracle
+from src.artifacts import load_artifacts, save_artifacts
+from src.fold_cache import FoldCache
+from src.profiling import REPORTS_DIR, RunProfiler, stage
+from src.teams import build_alias_map, resolve_team
 
 def ensure_data_folder():
     if not os.path.exists('data'):
         os.makedirs('data')
 
 #False to scrape data True to skip
-def run_full_pipeline(skip_scraping=False):
+def run_full_pipeline(skip_scraping=False, use_saved_models=False, csv_debug=False, early_stopping=False, joint=False,
+                      profile=False):
+    # Every run writes a report (time, CPU, peak memory, rows per stage and fold) to reports/,
+    # profile=True also dumps a cProfile file per stage
+    started = pd.Timestamp.now()
+    profile_dir = os.path.join(REPORTS_DIR, f"profile_{started.strftime('%Y%m%d_%H%M%S')}") if profile else None
+
+    with RunProfiler(profile_dir) as profiler:
+        try:
+            return _run_pipeline(skip_scraping, use_saved_models, csv_debug, early_stopping, joint)
+        finally:
+            json_path, _ = profiler.save()
+            print(f'Run report: {json_path}')
+
+def _run_pipeline(skip_scraping, use_saved_models, csv_debug, early_stopping, joint):
 
     ensure_data_folder()
     
     if not skip_scraping:
         try:
-            scrape_raw_data()
+            with stage('scrape'):
+                scrape_raw_data()
         except Exception as e:
             print(f"Error scraping: {e}")
             return None
 
     try:
-        load_and_process_data()
-        elo_model()
-        add_rolling_stats()
-        
-        df = load_data()
-        cons_models, chaos_models, rmses = train_and_evaluate(df)
-        return df, cons_models, chaos_models
+        # Feature stages only rerun when their inputs, params or code changed
+        df = feature_pipeline(csv_debug=csv_debug).run()
+
+        # Serve the saved models if they still match the feature file and params
+        if use_saved_models:
+            with stage('load_artifacts'):
+                cached = load_artifacts(early_stopping=early_stopping, joint=joint)
+            if cached:
+                oracle, (cons_rmse, chaos_rmse) = cached
+                print(f'Loaded saved models (Conservative RMSE: {cons_rmse}, Chaos RMSE: {chaos_rmse})')
+                return oracle
+
+        # Folds seen on an earlier run are read back from the cache, only new weeks are trained
+        with stage('train', rows=len(df)):
+            cons_models, chaos_models, rmses = train_and_evaluate(df, cache=FoldCache(), early_stopping=early_stopping,
+                                                                  joint=joint, save_predictions=True)
+        with stage('build_oracle', rows=len(df)):
+            oracle = NBAOracle(df, cons_models, chaos_models)
         
     except Exception as e:
         print(f"Error in pipeline: {e}")
         return None
 
+    try:
+        with stage('save_artifacts'):
+            save_artifacts(cons_models, chaos_models, rmses, oracle.state, oracle.store, early_stopping=early_stopping)
+    except Exception as e:
+        print(f"Error saving models: {e}")
+
+    return oracle
+
 def interactive_prediction_loop(oracle):
-    teams = sorted(oracle.index.keys())
+    aliases = build_alias_map(oracle.index)
     
-    print("\nEnter matchups (or 'q' to exit)")
+    print("\nEnter matchups, optionally on a date: 'home vs away on YYYY-MM-DD' (or 'q' to exit)")
     
     while True:
         try:
@@ -51,6 +89,14 @@ def interactive_prediction_loop(oracle):
             if user_input.lower() in ['q', 'exit']:
                 break
             
+            # Past or scheduled games are priced with the state as of that day
+            as_of = None
+            # Found and cut case-insensitively, 'BOS vs MIA ON 2024-01-10' works too
+            cut = user_input.lower().rfind(' on ')
+            if cut >= 0:
+                user_input, date_input = user_input[:cut], user_input[cut + len(' on '):]
+                as_of = pd.Timestamp(date_input.strip())
+
             if ' vs ' in user_input.lower():
                 parts = user_input.lower().split(' vs ')
             elif ' @ ' in user_input.lower():
@@ -59,24 +105,16 @@ def interactive_prediction_loop(oracle):
                 print("Invalid format.")
                 continue
             
-            home_input = parts[0].strip()
-            away_input = parts[1].strip()
-            
-            home_match = None
-            away_match = None
-            
-            for team in teams:
-                if home_input in team.lower():
-                    home_match = team
-                if away_input in team.lower():
-                    away_match = team
+            # Full names, nicknames, unique cities and abbreviations ('bos vs lal')
+            home_match = resolve_team(parts[0], aliases)
+            away_match = resolve_team(parts[1], aliases)
             
             if not home_match or not away_match:
                 print("Team not found.")
                 continue
             
             print()
-            oracle.predict(home_match, away_match)
+            oracle.predict(home_match, away_match, as_of=as_of)
             
         except KeyboardInterrupt:
             break
@@ -84,17 +122,25 @@ def interactive_prediction_loop(oracle):
             print(f"Error: {e}")
 
 def main():
-    skip_scraping = False
-    if len(sys.argv) > 1 and sys.argv[1] == '--skip-scraping':
-        skip_scraping = True
+    skip_scraping = '--skip-scraping' in sys.argv
+    force_retrain = '--retrain' in sys.argv
+    csv_debug = '--csv-debug' in sys.argv
+    early_stopping = '--early-stopping' in sys.argv
+    joint = '--joint' in sys.argv
+    serve_http = '--serve' in sys.argv
+    profile = '--profile' in sys.argv
+    port = int(next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('--port=')), 8000))
 
-    result = run_full_pipeline(skip_scraping=skip_scraping)
+    oracle = run_full_pipeline(skip_scraping=skip_scraping, use_saved_models=skip_scraping and not force_retrain,
+                               csv_debug=csv_debug, early_stopping=early_stopping, joint=joint, profile=profile)
     
-    if not result:
+    if not oracle:
         return
 
-    df, cons_models, chaos_models = result
-    oracle = NBAOracle(df, cons_models, chaos_models)
+    if serve_http:
+        from src.service import serve
+        serve(oracle, port=port)
+        return
     
     interactive_prediction_loop(oracle)
 
@@ -0,0 +1,133 @@
+import pandas as pd
+import xgboost as xgb
+import hashlib
+import json
+import os
+import shutil
+
+from src.model import FEATURES, get_params, NBAOracle
+from src.feature_store import FeatureStore
+from src.storage import frame_path
+from src.team_state import TeamStateStore
+
+# Bump when the layout of the saved files changes
+ARTIFACT_VERSION = 2
+MODELS_DIR = 'models'
+KEEP_VERSIONS = 3
+
+BOOSTER_FILES = ['cons_home', 'cons_away', 'chaos_home', 'chaos_away']
+# A joint family (one multi-output model) is saved as '<family>_joint' instead
+FAMILIES = ['cons', 'chaos']
+
+
+def artifact_fingerprint(features_file='nba_features_with_rolling.csv', start_date='2023-10-24', early_stopping=False,
+                         joint=False):
+    # Everything the trained models depend on: the feature file contents, the params of
+    # both families, the feature list and the artifact layout itself
+    features_path = frame_path(features_file)
+    if not os.path.exists(features_path):
+        return None
+
+    h = hashlib.sha256()
+    with open(features_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+
+    meta = {
+        'version': ARTIFACT_VERSION,
+        'features': FEATURES,
+        'params': {mode: get_params(mode, early_stopping, joint) for mode in ['conservative', 'chaos']},
+        'start_date': start_date,
+    }
+    h.update(json.dumps(meta, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def save_artifacts(cons_models, chaos_models, rmses, state, store, features_file='nba_features_with_rolling.csv', out_dir=MODELS_DIR,
+                   early_stopping=False):
+    joint = cons_models[1] is None
+    fingerprint = artifact_fingerprint(features_file, early_stopping=early_stopping, joint=joint)
+    if fingerprint is None:
+        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {frame_path(features_file)}.")
+
+    # Write into a temp folder first so a crash never leaves a half-written version behind
+    version_dir = os.path.join(out_dir, fingerprint[:16])
+    tmp_dir = version_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # Boosters in XGBoost's native binary (UBJSON) format
+    models = {}
+    for family, (model_home, model_away) in zip(FAMILIES, [cons_models, chaos_models]):
+        if model_away is None:
+            models[f'{family}_joint'] = model_home
+        else:
+            models[f'{family}_home'], models[f'{family}_away'] = model_home, model_away
+    for name, model in models.items():
+        model.save_model(os.path.join(tmp_dir, f'{name}.ubj'))
+
+    state.save(os.path.join(tmp_dir, 'team_state.npz'))
+    store.save(os.path.join(tmp_dir, 'feature_store.npz'))
+
+    manifest = {
+        'version': ARTIFACT_VERSION,
+        'fingerprint': fingerprint,
+        'created': pd.Timestamp.now().isoformat(),
+        'features': FEATURES,
+        'rmse': {'conservative': float(rmses[0]), 'chaos': float(rmses[1])},
+        'boosters': list(models),
+        'trees': {name: model.get_booster().num_boosted_rounds() for name, model in models.items()},
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.replace(tmp_dir, version_dir)
+    _prune_versions(out_dir)
+    return version_dir
+
+
+def _prune_versions(out_dir):
+    versions = [os.path.join(out_dir, d) for d in os.listdir(out_dir)
+                if os.path.exists(os.path.join(out_dir, d, 'manifest.json'))]
+    versions.sort(key=os.path.getmtime, reverse=True)
+    for old in versions[KEEP_VERSIONS:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def load_artifacts(features_file='nba_features_with_rolling.csv', out_dir=MODELS_DIR, early_stopping=False,
+                   joint=False):
+    # Returns (oracle, rmses) when saved models match the current features and params,
+    # otherwise None and the caller has to retrain
+    fingerprint = artifact_fingerprint(features_file, early_stopping=early_stopping, joint=joint)
+    if fingerprint is None:
+        return None
+
+    version_dir = os.path.join(out_dir, fingerprint[:16])
+    manifest_path = os.path.join(version_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('fingerprint') != fingerprint or manifest.get('features') != FEATURES:
+        return None
+
+    models = {}
+    for name in manifest.get('boosters', BOOSTER_FILES):
+        model = xgb.XGBRegressor()
+        model.load_model(os.path.join(version_dir, f'{name}.ubj'))
+        models[name] = model
+
+    families = []
+    for family in FAMILIES:
+        if f'{family}_joint' in models:
+            families.append((models[f'{family}_joint'], None))
+        else:
+            families.append((models[f'{family}_home'], models[f'{family}_away']))
+
+    state = TeamStateStore.load(os.path.join(version_dir, 'team_state.npz'))
+    store = FeatureStore.load(os.path.join(version_dir, 'feature_store.npz'))
+    oracle = NBAOracle(None, *families, state=state, store=store)
+    rmses = (manifest['rmse']['conservative'], manifest['rmse']['chaos'])
+    return oracle, rmses
@@ -0,0 +1,152 @@
+import pandas as pd
+import numpy as np
+import itertools
+import os
+
+from src.betting import line_probabilities, expected_value, kelly_stake
+from src.model import OOF_FILES
+from src.storage import frame_exists, frame_path, read_frame
+
+# Historical lines table: GAME_DATE, home, away, line, over_odds, under_odds (decimal odds).
+# Any extra columns (e.g. book) are ignored, several books per game are fine.
+LINES_FILE = 'historical_lines.csv'
+LINES_COLUMNS = ['GAME_DATE', 'home', 'away', 'line', 'over_odds', 'under_odds']
+
+EV_THRESHOLDS = [0.0, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15]
+FLAT_UNITS = [0.005, 0.01, 0.02]
+KELLY_SCALES = [0.1, 0.25, 0.5, 1.0]
+
+
+def load_lines(file_name=LINES_FILE, base_dir='data'):
+    # Local CSV or Parquet file of historical lines
+    if not frame_exists(file_name, base_dir):
+        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {os.path.join(base_dir, file_name)}.")
+    lines = read_frame(file_name, base_dir)
+
+    missing = [c for c in LINES_COLUMNS if c not in lines.columns]
+    if missing:
+        raise ValueError(f"Lines table is missing columns: {', '.join(missing)}")
+    lines['GAME_DATE'] = pd.to_datetime(lines['GAME_DATE'])
+    return lines
+
+
+def load_predictions(family, base_dir='data'):
+    # Out-of-fold predictions saved by train_and_evaluate(save_predictions=True)
+    file_name = OOF_FILES[family]
+    if not frame_exists(file_name, base_dir):
+        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {frame_path(file_name, base_dir)}. "
+                                f"Run train_and_evaluate with save_predictions=True first.")
+    return read_frame(file_name, base_dir)
+
+
+def candidate_bets(predictions, lines, rmse):
+    # One candidate bet per game: the side and line (over all books) with the highest EV
+    # for this family's prediction. `result` is the return per unit staked: odds - 1 on a win,
+    # -1 on a loss and 0 on a push.
+    games = predictions.rename(columns={'TEAM_NAME_home': 'home', 'TEAM_NAME_away': 'away'})
+    games = games.assign(actual_total=games['PTS_home'] + games['PTS_away'])
+    merged = lines[LINES_COLUMNS].merge(
+        games[['GAME_DATE', 'home', 'away', 'pred_total', 'actual_total']], on=['GAME_DATE', 'home', 'away'])
+
+    line = merged['line'].to_numpy(dtype=np.float64)
+    odds = np.stack([merged['over_odds'].to_numpy(dtype=np.float64), merged['under_odds'].to_numpy(dtype=np.float64)])
+    prob = np.stack(line_probabilities(merged['pred_total'].to_numpy(dtype=np.float64), line, rmse))
+    ev = expected_value(prob, odds)
+
+    # Per line: the better side (0 over, 1 under)
+    side = ev.argmax(axis=0)
+    rows = np.arange(len(merged))
+    bets = merged[['GAME_DATE', 'home', 'away', 'line', 'pred_total', 'actual_total']].copy()
+    bets['side'] = np.where(side == 0, 'over', 'under')
+    bets['odds'] = odds[side, rows]
+    bets['prob'] = prob[side, rows]
+    bets['ev'] = ev[side, rows]
+
+    margin = (bets['actual_total'] - bets['line']).to_numpy() * np.where(side == 0, 1, -1)
+    bets['result'] = np.where(margin > 0, bets['odds'] - 1, np.where(margin < 0, -1.0, 0.0))
+
+    # Line shopping: keep the best line of each game
+    bets = bets.sort_values(['GAME_DATE', 'home', 'away', 'ev'], ascending=[True, True, True, False], kind='stable')
+    return bets.drop_duplicates(['GAME_DATE', 'home', 'away']).reset_index(drop=True)
+
+
+def strategy_grid(ev_thresholds=EV_THRESHOLDS, flat_units=FLAT_UNITS, kelly_scales=KELLY_SCALES):
+    # Flat: `size` of the starting bankroll per bet. Kelly: `size` times the Kelly fraction
+    # of the current bankroll. A bet is placed when its EV reaches the threshold.
+    rows = [('flat', size, threshold) for size, threshold in itertools.product(flat_units, ev_thresholds)]
+    rows += [('kelly', size, threshold) for size, threshold in itertools.product(kelly_scales, ev_thresholds)]
+    return pd.DataFrame(rows, columns=['staking', 'size', 'ev_threshold'])
+
+
+def run_backtest(bets, strategies, max_stake=0.1):
+    # Every strategy over the same bets at once, as (n_strategies, n_bets) arrays. Bets are
+    # settled one after another in date order, Kelly stakes are capped at `max_stake` of
+    # the bankroll. Flat staking stops once the bankroll can't cover the next stake (ruin,
+    # `ruined` in the summary), so it never goes below zero. Returns the summary per
+    # strategy and the bankroll curves (starting at 1).
+    result = bets['result'].to_numpy(dtype=np.float64)
+    ev = bets['ev'].to_numpy(dtype=np.float64)
+    kelly = kelly_stake(bets['prob'].to_numpy(dtype=np.float64), bets['odds'].to_numpy(dtype=np.float64))
+
+    size = strategies['size'].to_numpy(dtype=np.float64)[:, None]
+    placed = ev >= strategies['ev_threshold'].to_numpy(dtype=np.float64)[:, None]
+    is_kelly = (strategies['staking'] == 'kelly').to_numpy()[:, None]
+
+    # Flat stakes are fixed amounts, Kelly stakes are fractions of the bankroll at the time
+    fraction = np.where(placed, np.minimum(size * kelly, max_stake), 0.0)
+    compounded = np.cumprod(1 + fraction * result, axis=1)
+    flat_stake = np.where(placed, size, 0.0)
+    flat = 1 + np.cumsum(flat_stake * result, axis=1)
+
+    # Ruin: after the first bet that leaves less than one flat stake no more bets are placed.
+    # Every stake up to there was covered, so the bankroll stays at or above zero.
+    broke = ~is_kelly & (flat < size)
+    ruined = broke.any(axis=1)
+    placed &= np.cumsum(broke, axis=1) - broke == 0
+    flat_stake = np.where(placed, size, 0.0)
+    flat = 1 + np.cumsum(flat_stake * result, axis=1)
+    curves = np.concatenate([np.ones((len(strategies), 1)), np.where(is_kelly, compounded, flat)], axis=1)
+
+    # Amount staked on each bet (Kelly: fraction of the bankroll before the bet)
+    staked = np.where(is_kelly, fraction * curves[:, :-1], flat_stake)
+    peak = np.maximum.accumulate(curves, axis=1)
+    n_bets = placed.sum(axis=1)
+    wins = (placed & (result > 0)).sum(axis=1)
+    total_staked = staked.sum(axis=1)
+
+    summary = strategies.reset_index(drop=True).copy()
+    summary['bets'] = n_bets
+    summary['hit_rate'] = np.divide(wins, n_bets, out=np.full(len(summary), np.nan), where=n_bets > 0)
+    summary['ruined'] = ruined
+    summary['final_bankroll'] = curves[:, -1]
+    summary['profit'] = curves[:, -1] - 1
+    summary['roi'] = np.divide(summary['profit'].to_numpy(), total_staked, out=np.full(len(summary), np.nan),
+                               where=total_staked > 0)
+    summary['max_drawdown'] = ((peak - curves) / peak).max(axis=1)
+    return summary, curves
+
+
+def backtest_families(lines=None, rmses=None, strategies=None, families=('conservative', 'chaos'),
+                      max_stake=0.1, base_dir='data'):
+    # Summary of every strategy for every family (sorted by profit) and the bankroll curves:
+    # {family: (bets, curves)}. rmses: {family: walk-forward RMSE}, defaults to the RMSE of the
+    # saved predictions themselves.
+    lines = load_lines(base_dir=base_dir) if lines is None else lines
+    strategies = strategy_grid() if strategies is None else strategies
+
+    summaries, curves = [], {}
+    for family in families:
+        predictions = load_predictions(family, base_dir)
+        if rmses is not None:
+            rmse = rmses[family]
+        else:
+            error = predictions['pred_total'] - (predictions['PTS_home'] + predictions['PTS_away'])
+            rmse = float(np.sqrt(np.mean(error ** 2)))
+
+        bets = candidate_bets(predictions, lines, rmse)
+        summary, family_curves = run_backtest(bets, strategies, max_stake)
+        summaries.append(summary.assign(family=family))
+        curves[family] = (bets, family_curves)
+
+    report = pd.concat(summaries, ignore_index=True).sort_values('profit', ascending=False, ignore_index=True)
+    return report, curves
@@ -0,0 +1,59 @@
+import numpy as np
+from scipy.stats import norm
+
+# Columns of a lines table: one offered total per row (several books per game are fine)
+LINE_COLUMNS = ['home', 'away', 'line', 'over_odds', 'under_odds']
+
+
+def line_probabilities(prediction, line, rmse):
+    # Same model as quick_ev in the notebook: the actual total ~ Normal(prediction, rmse).
+    # Returns (P(over), P(under)), any mix of scalars and arrays broadcasts.
+    z = (np.asarray(line, dtype=np.float64) - prediction) / rmse
+    return norm.sf(z), norm.cdf(z)
+
+
+def expected_value(prob, odds):
+    # EV per unit staked at decimal odds
+    return prob * (odds - 1) - (1 - prob)
+
+
+def kelly_stake(prob, odds, scale=1.0):
+    # Kelly fraction of the bankroll (0 when the bet has no edge), `scale` < 1 for fractional Kelly
+    return np.maximum(expected_value(prob, odds) / (odds - 1), 0) * scale
+
+
+def score_lines(prediction, line, over_odds, under_odds, rmse, kelly_scale=1.0):
+    # Probabilities, EV and Kelly stakes for both sides of every line in one broadcast
+    prob_over, prob_under = line_probabilities(prediction, line, rmse)
+    return {
+        'prob_over': prob_over,
+        'prob_under': prob_under,
+        'ev_over': expected_value(prob_over, over_odds),
+        'ev_under': expected_value(prob_under, under_odds),
+        'kelly_over': kelly_stake(prob_over, over_odds, kelly_scale),
+        'kelly_under': kelly_stake(prob_under, under_odds, kelly_scale),
+    }
+
+
+def score_slate(predictions, lines, rmses, kelly_scale=1.0):
+    # predictions: NBAOracle.predict_many output, lines: LINE_COLUMNS table, rmses: walk-forward
+    # (conservative, chaos) RMSE from train_and_evaluate. Returns the lines with, per family,
+    # the predicted total and the score_lines columns (prefixed 'cons_' / 'chaos_').
+    # Games are matched on home/away, and on GAME_DATE too when both tables have it.
+    missing = [c for c in LINE_COLUMNS if c not in lines.columns]
+    if missing:
+        raise ValueError(f"Lines table is missing columns: {', '.join(missing)}")
+
+    keys = ['home', 'away'] + (['GAME_DATE'] if 'GAME_DATE' in lines and 'GAME_DATE' in predictions else [])
+    totals = predictions[keys + ['cons_total', 'chaos_total']].drop_duplicates(keys)
+    out = lines.reset_index(drop=True).merge(totals, on=keys, how='left', validate='many_to_one')
+
+    line = out['line'].to_numpy(dtype=np.float64)
+    over_odds = out['over_odds'].to_numpy(dtype=np.float64)
+    under_odds = out['under_odds'].to_numpy(dtype=np.float64)
+    for family, rmse in zip(['cons', 'chaos'], rmses):
+        scores = score_lines(out[f'{family}_total'].to_numpy(dtype=np.float64), line, over_odds, under_odds,
+                             rmse, kelly_scale)
+        for name, values in scores.items():
+            out[f'{family}_{name}'] = values
+    return out
@@ -2,25 +2,84 @@ import pandas as pd
 import numpy as np
 import os
 
-def load_and_process_data(input_file='nba_games_2019_2025.csv', output_file='nba_features.csv'):
-    base_dir = 'data'
-    
-    input_path = os.path.join(base_dir, input_file)
-    output_path = os.path.join(base_dir, output_file)
+from src.schema import compact, read_games
+from src.storage import write_frame
 
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {input_path}. \n"
-                                f"Make sure you ran 'main.py' from the project root "
-                                f"and that the file exists in the 'data' folder.")
-    
-    # Load and sort the games data to ensure no data leakage will occur 
-    df = pd.read_csv(input_path)
+def estimate_possessions(fga, fta, oreb, tov):
+    # Standard NBA possession estimate, works on scalars and columns alike
+    return fga + 0.44 * fta - oreb + tov
+
+def valid_game_mask(off_eff_home, off_eff_away, pace):
+    # Filter bad data to avoid logical errors (so if efficiencies and pace are abnormaly high due to bad data)
+    return (
+        (off_eff_home < 3000) & (off_eff_home > 10) &
+        (off_eff_away < 3000) & (off_eff_away > 10) &
+        (pace < 2000) & (pace > 500)
+    )
+
+def team_game_log(df, columns=None):
+    # Stack home and away sides into one row per team per game, sorted by team and date.
+    # ROW is the game's position in df and IS_HOME the side, so results computed on the log can
+    # be put back with scatter_to_sides. `columns` maps log column -> (home, away), where each
+    # side is a column name of df or an array aligned with it.
+    # Team names stay categorical when both sides share the schema's team dtype
+    n = len(df)
+    log = pd.DataFrame({
+        'TEAM_NAME': pd.concat([df['TEAM_NAME_home'], df['TEAM_NAME_away']], ignore_index=True),
+        'GAME_DATE': np.concatenate([df['GAME_DATE'].to_numpy(), df['GAME_DATE'].to_numpy()]),
+        'IS_HOME': np.repeat(np.array([1, 0], dtype=np.int8), n),
+        'ROW': np.tile(np.arange(n), 2),
+    })
+    for name, sides in (columns or {}).items():
+        home, away = (df[side].to_numpy() if isinstance(side, str) else np.asarray(side) for side in sides)
+        log[name] = np.concatenate([home, away])
+
+    return log.sort_values(['TEAM_NAME', 'GAME_DATE', 'ROW'], kind='stable').reset_index(drop=True)
+
+def split_sides(log, values, n):
+    # Inverse of team_game_log: one value per log row -> (home values, away values) in game order
+    values = np.asarray(values)
+    out = np.empty(2 * n, dtype=values.dtype)
+    out[log['ROW'].to_numpy() + n * (1 - log['IS_HOME'].to_numpy().astype(np.int64))] = values
+    return out[:n], out[n:]
+
+def scatter_to_sides(df, log, values, home_col, away_col):
+    df[home_col], df[away_col] = split_sides(log, values, len(df))
+
+def add_schedule_features(df, default_rest=3, max_rest=7):
+    # Rest days (capped, 3 for a team's first game), back-to-backs, games played in the
+    # previous 3/4/7 days and 3-in-4 flags, all from one grouped date diff on the team log
+    log = team_game_log(df)
+    team = pd.factorize(log['TEAM_NAME'])[0].astype(np.int64)
+    day = log['GAME_DATE'].to_numpy().astype('datetime64[D]').astype(np.int64)
+
+    first = np.ones(len(log), dtype=bool)
+    first[1:] = team[1:] != team[:-1]
+    delta = np.diff(day, prepend=0)
+    rest = np.where(first, default_rest, np.minimum(delta, max_rest))
+
+    # Team and day packed into one sorted key, so "previous N days" is a searchsorted window
+    key = team * 1_000_000 + day
+    position = np.arange(len(log))
+    games_last = {n_days: position - np.searchsorted(key, key - n_days, side='left') for n_days in [3, 4, 7]}
+
+    scatter_to_sides(df, log, rest, 'home_rest_days', 'away_rest_days')
+    scatter_to_sides(df, log, (rest == 1).astype(np.int8), 'home_b2b', 'away_b2b')
+    scatter_to_sides(df, log, games_last[4], 'home_games_last_4', 'away_games_last_4')
+    scatter_to_sides(df, log, games_last[7], 'home_games_last_7', 'away_games_last_7')
+    # Third game in four days: two other games in the three days before this one
+    scatter_to_sides(df, log, (games_last[3] >= 2).astype(np.int8), 'home_3in4', 'away_3in4')
+    return df
+
+def process_games(df):
+    # In-memory version of the stage: raw merged games in, features frame out
+    # Sort the games data to ensure no data leakage will occur 
     df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
     df = df.sort_values(['GAME_DATE', 'GAME_ID']).reset_index(drop=True)
 
     # Estimate possesions from the standard NBA formula
-    df['POSS_home'] = df['FGA_home'] + 0.44 * df['FTA_home'] - df['OREB_home'] + df['TOV_home']
-    df['POSS_away'] = df['FGA_away'] + 0.44 * df['FTA_away'] - df['OREB_away'] + df['TOV_away']
+    df['POSS_home'] = estimate_possessions(df['FGA_home'], df['FTA_home'], df['OREB_home'], df['TOV_home'])
+    df['POSS_away'] = estimate_possessions(df['FGA_away'], df['FTA_away'], df['OREB_away'], df['TOV_away'])
 
     # Estimate game pace 
     # Pace of the game is derived from the formula 48 * (pace of home and away) / mins of the game
@@ -36,46 +95,28 @@ def load_and_process_data(input_file='nba_games_2019_2025.csv', output_file='nba
     df['OFF_EFF_away_actual'] = (df['PTS_away'] / df['POSS_away']) * 1000
     df['PACE_actual'] = df['GAME_PACE'] * 10 
 
-    # Filter bad data to avoid logical errors (so if efficiencies and pace are abnormaly high due to bad data)
-    cols_to_check = ['OFF_EFF_home_actual', 'OFF_EFF_away_actual', 'PACE_actual']
-    df.dropna(subset=cols_to_check, inplace=True)
-
-    mask_valid = (
-        (df['OFF_EFF_home_actual'] < 3000) & (df['OFF_EFF_home_actual'] > 10) &
-        (df['OFF_EFF_away_actual'] < 3000) & (df['OFF_EFF_away_actual'] > 10) &
-        (df['PACE_actual'] < 2000) & (df['PACE_actual'] > 500)
-    )
+    # Filter bad data (NaN efficiencies fail the range checks as well)
+    mask_valid = valid_game_mask(df['OFF_EFF_home_actual'], df['OFF_EFF_away_actual'], df['PACE_actual'])
     df = df[mask_valid].reset_index(drop=True)
 
-    # Calculate rest days
-    last_game_date = {}
-    home_rest_days = []
-    away_rest_days = []
-
-    for idx, row in df.iterrows():
-        home, away, date = row['TEAM_NAME_home'], row['TEAM_NAME_away'], row['GAME_DATE']
-        
-        # Home Rest
-        if home in last_game_date:
-            delta = (date - last_game_date[home]).days
-            home_rest_days.append(min(delta, 7))
-        else:
-            home_rest_days.append(3) # Set default to 3 rest days 
-            
-        # Away Rest
-        if away in last_game_date:
-            delta = (date - last_game_date[away]).days
-            away_rest_days.append(min(delta, 7))
-        else:
-            away_rest_days.append(3)
-            
-        last_game_date[home] = date
-        last_game_date[away] = date
-
-    df['home_rest_days'] = home_rest_days
-    df['away_rest_days'] = away_rest_days
+    # Calculate rest days and the other schedule features
+    df = add_schedule_features(df)
+
+    return compact(df)
+
+def load_and_process_data(input_file='nba_games_2019_2025.csv', output_file='nba_features.csv', csv_debug=False):
+    base_dir = 'data'
+    
+    input_path = os.path.join(base_dir, input_file)
+
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {input_path}. \n"
+                                f"Make sure you ran 'main.py' from the project root "
+                                f"and that the file exists in the 'data' folder.")
+    
+    df = process_games(read_games(input_path))
 
     # Save the file. Return the dataframe so the next step (Elo) can use it directly in memory,
-    # but  also save a copy for debugging.
-    df.to_csv(output_path, index=False)
+    # but  also save a copy (pass csv_debug=True to get a CSV for debugging).
+    write_frame(df, output_file, base_dir, csv_debug=csv_debug)
     return df
\ No newline at end of file
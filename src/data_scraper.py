@@ -1,76 +1,219 @@
 import pandas as pd
 import os
+import random
 import time
-from nba_api.stats.endpoints import leaguegamelog
-
-def scrape_raw_data():
-    target_seasons = [
-        '2019-20', 
-        '2020-21', 
-        '2021-22', 
-        '2022-23', 
-        '2023-24', 
-        '2024-25',
-        '2025-26'
-    ]
+
+from src.storage import frame_exists, read_frame, write_frame
+
+TARGET_SEASONS = [
+    '2019-20',
+    '2020-21',
+    '2021-22',
+    '2022-23',
+    '2023-24',
+    '2024-25',
+    '2025-26'
+]
+
+# Raw API responses, one file per season and log type ('T' teams, 'P' players)
+CACHE_DIR = os.path.join('data', 'raw_cache')
+
+# Rows are unique on these keys, used to merge refetched days into the cache
+LOG_KEYS = {'T': ['GAME_ID', 'TEAM_ID'], 'P': ['GAME_ID', 'PLAYER_ID']}
+
+
+class TokenBucket:
+    # Rate limiter so that NBA API doesn't kick me out when im scarping the data.
+    # Allows short bursts up to `capacity` and `rate` requests per second on average.
+    def __init__(self, rate=1 / 1.5, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+
+    def acquire(self):
+        while True:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            self.sleep((1 - self.tokens) / self.rate)
+
+
+def fetch_league_log(season, kind, date_from=None):
+    # Default endpoint, imported lazily so the rest of the scraper works without nba_api
+    from nba_api.stats.endpoints import leaguegamelog
+
+    kwargs = {}
+    if date_from is not None:
+        kwargs['date_from_nullable'] = pd.Timestamp(date_from).strftime('%m/%d/%Y')
+    log = leaguegamelog.LeagueGameLog(season=season, player_or_team_abbreviation=kind, **kwargs)
+    return log.get_data_frames()[0]
+
+
+def fetch_with_retries(request, limiter, retries=4, backoff=2.0, sleep=None):
+    # Backoff waits go through the limiter's sleep unless `sleep` is given
+    sleep = limiter.sleep if sleep is None else sleep
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            return request()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            # Exponential backoff with a bit of jitter
+            delay = backoff ** attempt * (1 + random.random() * 0.25)
+            print(f"Request failed ({e}), retrying in {delay:.1f}s")
+            sleep(delay)
+
+
+def season_is_closed(season, today=None):
+    # A 'YYYY-YY' season is over once July of its second year has started
+    today = pd.Timestamp.today() if today is None else pd.Timestamp(today)
+    return today >= pd.Timestamp(f'{int(season[:4]) + 1}-07-01')
+
+
+def _normalize_log(df):
+    # Same key types whether the log came from the API, Parquet or the CSV fallback
+    df = df.copy()
+    df['GAME_ID'] = df['GAME_ID'].astype(str).str.zfill(10)
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    return df
+
+
+def update_season_log(season, kind, fetch, limiter, cache_dir=CACHE_DIR, today=None):
+    # Returns the season's raw log and whether anything new was fetched.
+    # Only the days from the last stored GAME_DATE on are requested; that day is refetched
+    # as well, in case some of its games were still in progress on the previous run. A
+    # closed season gets one more fetch like that after it closes and is frozen after it
+    # (a '.closed' marker next to the cache file). When the fetch fails the cached log is
+    # returned unchanged; without a cache the error is raised.
+    name = f'{kind}_{season}'
+    closed_marker = os.path.join(cache_dir, f'{name}.closed')
+    cached = _normalize_log(read_frame(name, cache_dir)) if frame_exists(name, cache_dir) else None
+
+    if cached is not None and os.path.exists(closed_marker):
+        return cached, False
+
+    date_from = None
+    if cached is not None and len(cached):
+        date_from = cached['GAME_DATE'].max()
+
+    try:
+        fresh = fetch_with_retries(lambda: fetch(season, kind, date_from), limiter)
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"Fetching {name} failed ({e}), using the cached log")
+        return cached, False
+
+    if fresh is None or len(fresh) == 0:
+        combined, changed = cached if cached is not None else pd.DataFrame(), False
+    else:
+        fresh = _normalize_log(fresh)
+        if cached is not None:
+            # Rows identical to the cache are dropped first, whatever is left is new or corrected
+            combined = pd.concat([cached, fresh], ignore_index=True).drop_duplicates(keep='first')
+            changed = len(combined) != len(cached)
+            combined = combined.drop_duplicates(subset=LOG_KEYS[kind], keep='last')
+        else:
+            combined, changed = fresh, True
+
+    if changed:
+        write_frame(combined.reset_index(drop=True), name, cache_dir)
+    if season_is_closed(season, today) and (changed or cached is not None):
+        open(closed_marker, 'w').close()
+    return combined, changed
+
+
+def merge_team_log(raw_team_df):
+    # Parsing and spliting data into home and away games
+    home_teams = raw_team_df[raw_team_df['MATCHUP'].str.contains('vs.')].copy()
+    away_teams = raw_team_df[raw_team_df['MATCHUP'].str.contains('@')].copy()
+
+    # Set uqique columns that I am gona merge on
+    # these keyes wont have _home or _away suffixes, as they are uniform for both
+    merge_keys = ['GAME_ID', 'GAME_DATE', 'SEASON_ID']
+
+    # Optional: If 'VIDEO_AVAILABLE' exists and is always same, add it too
+    if 'VIDEO_AVAILABLE' in raw_team_df.columns:
+        merge_keys.append('VIDEO_AVAILABLE')
+
+    return pd.merge(
+        home_teams,
+        away_teams,
+        on=merge_keys,
+        suffixes=('_home', '_away')
+    )
+
+
+def scrape_raw_data(seasons=TARGET_SEASONS, fetch=fetch_league_log, limiter=None, cache_dir=CACHE_DIR,
+                    output_folder='data', today=None):
+    # `fetch(season, kind, date_from)` returns a LeagueGameLog-shaped frame, swap it for a
+    # local fake endpoint in tests
+    if limiter is None:
+        limiter = TokenBucket()
+    os.makedirs(cache_dir, exist_ok=True)
 
     processed_team_dfs = []
     processed_player_dfs = []
+    any_changed = False
+    missing = []
 
-    output_folder = 'data'
+    for season in seasons:
 
-    for season in target_seasons:
-        
         # Teams data (for version1 of the model)
         try:
-            # Parsing and spliting data into home and away games
-            team_log = leaguegamelog.LeagueGameLog(season=season, player_or_team_abbreviation='T')
-            raw_team_df = team_log.get_data_frames()[0]
-            home_teams = raw_team_df[raw_team_df['MATCHUP'].str.contains('vs.')].copy()
-            away_teams = raw_team_df[raw_team_df['MATCHUP'].str.contains('@')].copy()
-            
-            # Set uqique columns that I am gona merge on 
-            # these keyes wont have _home or _away suffixes, as they are uniform for both
-            merge_keys = ['GAME_ID', 'GAME_DATE', 'SEASON_ID']
-            
-            # Optional: If 'VIDEO_AVAILABLE' exists and is always same, add it too
-            if 'VIDEO_AVAILABLE' in raw_team_df.columns:
-                merge_keys.append('VIDEO_AVAILABLE')
-
-            games_merged = pd.merge(
-                home_teams,
-                away_teams,
-                on=merge_keys, 
-                suffixes=('_home', '_away')
-            )
-            
-            processed_team_dfs.append(games_merged)
-            
+            raw_team_df, changed = update_season_log(season, 'T', fetch, limiter, cache_dir, today)
+            any_changed |= changed
+            if len(raw_team_df):
+                processed_team_dfs.append(merge_team_log(raw_team_df))
+
         except Exception as e:
             print(f"Error fetching Team data for {season}: {e}")
+            missing.append(f'T_{season}')
 
         # Create raw players dataset for now (for version2 of the model)
         try:
-            player_log = leaguegamelog.LeagueGameLog(season=season, player_or_team_abbreviation='P')
-            raw_player_df = player_log.get_data_frames()[0]
-            
-            raw_player_df['IS_HOME'] = raw_player_df['MATCHUP'].str.contains('vs.').astype(int)
-            processed_player_dfs.append(raw_player_df)
-            
+            raw_player_df, changed = update_season_log(season, 'P', fetch, limiter, cache_dir, today)
+            any_changed |= changed
+            if len(raw_player_df):
+                raw_player_df = raw_player_df.copy()
+                raw_player_df['IS_HOME'] = raw_player_df['MATCHUP'].str.contains('vs.').astype(int)
+                processed_player_dfs.append(raw_player_df)
+
         except Exception as e:
             print(f"Error fetching Player data for {season}: {e}")
+            missing.append(f'P_{season}')
+
+    team_output_path = os.path.join(output_folder, 'nba_games_2019_2025.csv')
+    player_output_path = os.path.join(output_folder, 'nba_players_2019_2025.csv')
+
+    # A log with neither fresh nor cached data would truncate the history, keep the old CSVs
+    if missing:
+        print(f"No data for {', '.join(missing)}, the CSVs are left as they are")
+        return False
+
+    # Every season came back empty (e.g. before the first game): nothing to write
+    if not processed_team_dfs or not processed_player_dfs:
+        print("No games in any season, the CSVs are left as they are")
+        return False
+
+    # Nothing new: leave the CSVs (and everything hashed from them) untouched
+    if not any_changed and os.path.exists(team_output_path) and os.path.exists(player_output_path):
+        return False
 
-        time.sleep(1.5) # Set so that NBA API doesn't kick me out when im scarping the data
-    
     #Save data to the csv
     # Teams
     master_team_df = pd.concat(processed_team_dfs, ignore_index=True)
-    team_output_path = os.path.join(output_folder, 'nba_games_2019_2025.csv')
     master_team_df.to_csv(team_output_path, index=False)
 
-    # Players
+    # Players, kept in date order so they can be streamed chronologically
     master_player_df = pd.concat(processed_player_dfs, ignore_index=True)
-    player_output_path = os.path.join(output_folder, 'nba_players_2019_2025.csv')
+    master_player_df = master_player_df.sort_values(['GAME_DATE', 'GAME_ID'], kind='stable')
     master_player_df.to_csv(player_output_path, index=False)
-    
-    
\ No newline at end of file
+    return True
@@ -1,115 +1,450 @@
 import pandas as pd
 import numpy as np
+import hashlib
+import inspect
+import json
 import os
 
-def elo_model(input_csv_name='nba_features.csv', output_csv_name='nba_features_ready_for_model.csv', k_factor = 0.15, reversion = 0.01, base_elo = 1000):
-    # Setup paths
-    base_dir = 'data'
-    input_path = os.path.join(base_dir, input_csv_name)
-    output_path = os.path.join(base_dir, output_csv_name)
+from src import profiling
+from src.schema import compact
+from src.storage import frame_exists, frame_path, read_frame, write_frame
 
-    # Check if input file exists
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {input_path}. \n"
-                                f"Make sure the file exists in the '{base_dir}' folder.")
+# Number of recent ratings used for the league average (reversion target)
+LEAGUE_WINDOW = 1000
+
+# Elo snapshots kept for replays after corrections: one per Monday-to-Sunday week of games
+CHECKPOINT_DAYS = 7
+CHECKPOINTS_FILE = 'elo_checkpoints.npz'
+
+# Columns the ratings depend on, plus the date that places the checkpoints
+ELO_INPUTS = ['GAME_ID', 'GAME_DATE', 'TEAM_NAME_home', 'TEAM_NAME_away',
+              'OFF_EFF_home_actual', 'OFF_EFF_away_actual', 'PACE_actual']
+
+
+class EloState:
+    # Team ratings live in integer-indexed arrays (one slot per team), the league averages
+    # come from fixed ring buffers with running sums, so every game costs O(1).
+    def __init__(self, base_elo=1000, window=LEAGUE_WINDOW):
+        self.base_elo = float(base_elo)
+        self.window = window
+        self.teams = {}
+        self.ratings = np.empty((0, 3))  # columns: off, def, pace
+
+        # History for reversion, seeded with the base rating like the original lists
+        self.history = np.zeros((3, window))
+        self.history[:, 0] = self.base_elo
+        self.history_sum = np.full(3, self.base_elo)
+        self.history_count = 1
+        self.history_pos = 1 % window
+
+    def team_ids(self, names):
+        # Map team names to slots, adding unseen teams at the base rating
+        ids = np.empty(len(names), dtype=np.int64)
+        for i, name in enumerate(names):
+            idx = self.teams.get(name)
+            if idx is None:
+                idx = len(self.teams)
+                self.teams[name] = idx
+            ids[i] = idx
+
+        if len(self.teams) > len(self.ratings):
+            extra = np.full((len(self.teams) - len(self.ratings), 3), self.base_elo)
+            self.ratings = np.vstack([self.ratings, extra])
+        return ids
+
+    def copy(self):
+        other = EloState.__new__(EloState)
+        other.base_elo = self.base_elo
+        other.window = self.window
+        other.teams = dict(self.teams)
+        other.ratings = self.ratings.copy()
+        other.history = self.history.copy()
+        other.history_sum = self.history_sum.copy()
+        other.history_count = self.history_count
+        other.history_pos = self.history_pos
+        return other
+
+
+def run_elo(state, home_ids, away_ids, home_perf, away_perf, game_pace, k_factor=0.15, reversion=0.01):
+    # Advance the state through the games in order and return the pre-game ratings
+    # as an (n_games, 6) array: home off/def/pace, away off/def/pace.
+    # The loop works on plain python floats, numpy scalars are much slower one at a time.
+    n = len(home_ids)
+    pre = np.empty((n, 6))
+    if n == 0:
+        return pre
+
+    off, dfn, pace = state.ratings.T.tolist()
+    hist_off, hist_def, hist_pace = state.history.tolist()
+    sum_off, sum_def, sum_pace = state.history_sum.tolist()
+    count, pos, window = state.history_count, state.history_pos, state.window
+    k, rev = k_factor, reversion
+    keep = 1 - reversion
+
+    home_ids = home_ids.tolist()
+    away_ids = away_ids.tolist()
+    home_perf = home_perf.tolist()
+    away_perf = away_perf.tolist()
+    game_pace = game_pace.tolist()
+    out = [None] * n
+
+    for i in range(n):
+        home = home_ids[i]
+        away = away_ids[i]
 
-    df = pd.read_csv(input_path)
-
-    if 'GAME_DATE' in df.columns:
-        df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
-        # Sort by date to ensure Elo is calculated chronologically
-        df = df.sort_values(['GAME_DATE', 'GAME_ID']).reset_index(drop=True)
-
-    # Elo configuration 
-    K_FACTOR = k_factor
-    REVERSION = reversion
-    BASE_ELO = base_elo
-
-    # State Dictionaries
-    elo_off = {}
-    elo_def = {}
-    elo_pace = {}
-
-    # Lists to store features
-    home_off_pre, home_def_pre, home_pace_pre = [], [], []
-    away_off_pre, away_def_pre, away_pace_pre = [], [], []
-
-    # History for Reversion
-    history_off = [BASE_ELO]
-    history_def = [BASE_ELO]
-    history_pace = [BASE_ELO]
-
-    # Helper function to prevent explosion
-    def safe_update(old_rating, actual, expected, k, reversion, league_avg):
-        error = actual - expected
-        new_rating = old_rating + (k * error)
-        final_rating = (new_rating * (1 - reversion)) + (league_avg * reversion)
-
-        # SAFETY CLAMP: If rating goes crazy, reset to baseline
-        if np.isnan(final_rating) or final_rating > 3000 or final_rating < 0:
-            return 1000.0
-        return final_rating
-
-    # Elo loop
-    for idx, row in df.iterrows():
-        home = row['TEAM_NAME_home']
-        away = row['TEAM_NAME_away']
-        
         # Get current ratings
-        h_off = elo_off.get(home, BASE_ELO)
-        h_def = elo_def.get(home, BASE_ELO)
-        h_pace = elo_pace.get(home, BASE_ELO)
-        
-        a_off = elo_off.get(away, BASE_ELO)
-        a_def = elo_def.get(away, BASE_ELO)
-        a_pace = elo_pace.get(away, BASE_ELO)
-        
-        # Store features (pre-game state)
-        home_off_pre.append(h_off)
-        home_def_pre.append(h_def)
-        home_pace_pre.append(h_pace)
-        away_off_pre.append(a_off)
-        away_def_pre.append(a_def)
-        away_pace_pre.append(a_pace)
-        
-        # Prepare averages from last 1000 games (to keep things dynamic)
-        avg_off = np.mean(history_off[-1000:])
-        avg_def = np.mean(history_def[-1000:])
-        avg_pace = np.mean(history_pace[-1000:]) 
-        
-        # Update
-        h_perf = row['OFF_EFF_home_actual']
-        a_perf = row['OFF_EFF_away_actual']
-        game_pace = row['PACE_actual']
-        
+        h_off, h_def, h_pace = off[home], dfn[home], pace[home]
+        a_off, a_def, a_pace = off[away], dfn[away], pace[away]
+        out[i] = (h_off, h_def, h_pace, a_off, a_def, a_pace)
+
+        # League averages over the last LEAGUE_WINDOW ratings
+        avg_off = sum_off / count
+        avg_def = sum_def / count
+        avg_pace = sum_pace / count
+
+        h_perf = home_perf[i]
+        a_perf = away_perf[i]
+        g_pace = game_pace[i]
+
         # Logic A: Home Off / Away Def
         exp_h_off = h_off + (a_def - avg_def)
-        elo_off[home] = safe_update(h_off, h_perf, exp_h_off, K_FACTOR, REVERSION, avg_off)
-        elo_def[away] = safe_update(a_def, h_perf, exp_h_off, K_FACTOR, REVERSION, avg_def)
+        new_h_off = (h_off + k * (h_perf - exp_h_off)) * keep + avg_off * rev
+        new_a_def = (a_def + k * (h_perf - exp_h_off)) * keep + avg_def * rev
 
         # Logic B: Away Off / Home Def
         exp_a_off = a_off + (h_def - avg_def)
-        elo_off[away] = safe_update(a_off, a_perf, exp_a_off, K_FACTOR, REVERSION, avg_off)
-        elo_def[home] = safe_update(h_def, a_perf, exp_a_off, K_FACTOR, REVERSION, avg_def)
-        
+        new_a_off = (a_off + k * (a_perf - exp_a_off)) * keep + avg_off * rev
+        new_h_def = (h_def + k * (a_perf - exp_a_off)) * keep + avg_def * rev
+
         # Logic C: Pace
         exp_pace = (h_pace + a_pace) / 2
-        elo_pace[home] = safe_update(h_pace, game_pace, exp_pace, K_FACTOR, REVERSION, avg_pace)
-        elo_pace[away] = safe_update(a_pace, game_pace, exp_pace, K_FACTOR, REVERSION, avg_pace)
-        
-        # Update history
-        history_off.extend([elo_off[home], elo_off[away]])
-        history_def.extend([elo_def[home], elo_def[away]])
-        history_pace.extend([elo_pace[home], elo_pace[away]])
+        new_h_pace = (h_pace + k * (g_pace - exp_pace)) * keep + avg_pace * rev
+        new_a_pace = (a_pace + k * (g_pace - exp_pace)) * keep + avg_pace * rev
+
+        # SAFETY CLAMP: If rating goes crazy (or NaN), reset to baseline
+        if not 0 <= new_h_off <= 3000: new_h_off = 1000.0
+        if not 0 <= new_a_def <= 3000: new_a_def = 1000.0
+        if not 0 <= new_a_off <= 3000: new_a_off = 1000.0
+        if not 0 <= new_h_def <= 3000: new_h_def = 1000.0
+        if not 0 <= new_h_pace <= 3000: new_h_pace = 1000.0
+        if not 0 <= new_a_pace <= 3000: new_a_pace = 1000.0
+
+        off[home], dfn[away] = new_h_off, new_a_def
+        off[away], dfn[home] = new_a_off, new_h_def
+        pace[home], pace[away] = new_h_pace, new_a_pace
+
+        # Update history: home then away, same order as the original history lists
+        for v_off, v_def, v_pace in ((new_h_off, new_h_def, new_h_pace), (new_a_off, new_a_def, new_a_pace)):
+            if count == window:
+                sum_off -= hist_off[pos]
+                sum_def -= hist_def[pos]
+                sum_pace -= hist_pace[pos]
+            else:
+                count += 1
+            hist_off[pos] = v_off
+            hist_def[pos] = v_def
+            hist_pace[pos] = v_pace
+            sum_off += v_off
+            sum_def += v_def
+            sum_pace += v_pace
+            pos += 1
+            if pos == window:
+                pos = 0
+                # Re-sum once per lap so float drift of the running sums stays bounded
+                sum_off, sum_def, sum_pace = sum(hist_off), sum(hist_def), sum(hist_pace)
+
+    pre[:] = out
+
+    state.ratings = np.array([off, dfn, pace]).T.reshape(-1, 3)
+    state.history = np.array([hist_off, hist_def, hist_pace])
+    state.history_sum = np.array([sum_off, sum_def, sum_pace])
+    state.history_count = count
+    state.history_pos = pos
+    return pre
+
+
+def elo_params(k_factor, reversion, state):
+    # Everything besides the input rows that decides the ratings, including run_elo's code
+    return {'k_factor': float(k_factor), 'reversion': float(reversion), 'base_elo': state.base_elo,
+            'window': state.window, 'code': hashlib.sha256(inspect.getsource(run_elo).encode()).hexdigest()}
+
+
+def elo_row_hashes(df):
+    # One uint64 per game over the columns the ratings depend on
+    return pd.util.hash_pandas_object(df[ELO_INPUTS], index=False).to_numpy()
+
+
+def checkpoint_positions(dates):
+    # First row of every week (Monday to Sunday, 1970-01-01 was a Thursday) after the first
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    week = (days + 3) // CHECKPOINT_DAYS
+    return np.flatnonzero(week[1:] != week[:-1]) + 1
+
+
+class EloCheckpoints:
+    # Snapshots of the EloState of the last run (ratings and league window) at the start of
+    # every week and after the last game, with the hash of every input row and the float64
+    # pre-game ratings that run produced. A correction is replayed from the last snapshot
+    # before the first changed row, so its cost is the games from there on, not the history.
+    def __init__(self, params):
+        self.params = params
+        self.teams = []
+        self.positions = np.zeros(0, dtype=np.int64)
+        self.ratings = []
+        self.history = []
+        self.history_sum = []
+        self.history_meta = []
+        self.row_hash = np.zeros(0, dtype=np.uint64)
+        self.pre = np.empty((0, 6))
+
+    def add(self, position, state):
+        # Snapshot of `state` as it is before row `position`
+        self.positions = np.append(self.positions, position)
+        self.ratings.append(state.ratings.copy())
+        self.history.append(state.history.copy())
+        self.history_sum.append(state.history_sum.copy())
+        self.history_meta.append([state.history_count, state.history_pos])
+        self.teams = sorted(state.teams, key=state.teams.get)
+
+    def restart(self, row_hash, params):
+        # Index of the snapshot to replay from, None when everything has to be recomputed
+        if params != self.params:
+            return None
+        n = min(len(row_hash), len(self.row_hash))
+        changed = np.flatnonzero(row_hash[:n] != self.row_hash[:n])
+        first = changed[0] if len(changed) else n
+        i = int(np.searchsorted(self.positions, first, side='right')) - 1
+        return i if i >= 0 else None
+
+    def restore(self, i, state):
+        # Put snapshot i into a fresh `state`, drop the snapshots from i on (the replay adds
+        # them again) and return the row the replay starts at. Teams seen after the snapshot
+        # keep their slot at the base rating, which is the same as not being there yet.
+        ratings = self.ratings[i]
+        state.teams = {name: slot for slot, name in enumerate(self.teams)}
+        state.ratings = np.vstack([ratings, np.full((len(self.teams) - len(ratings), 3), state.base_elo)])
+        state.history = self.history[i].copy()
+        state.history_sum = self.history_sum[i].copy()
+        state.history_count, state.history_pos = (int(v) for v in self.history_meta[i])
+
+        start = int(self.positions[i])
+        self.positions = self.positions[:i]
+        for snapshots in [self.ratings, self.history, self.history_sum, self.history_meta]:
+            del snapshots[i:]
+        return start
+
+    def save(self, path):
+        # Written under a temp name and renamed, an interrupted run leaves the old file
+        n_teams = len(self.teams)
+        ratings = np.stack([np.vstack([r, np.full((n_teams - len(r), 3), self.params['base_elo'])])
+                            for r in self.ratings])
+        tmp = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(
+            tmp,
+            params=np.array(json.dumps(self.params, sort_keys=True)),
+            teams=np.array(self.teams), positions=self.positions, ratings=ratings,
+            history=np.stack(self.history), history_sum=np.stack(self.history_sum),
+            history_meta=np.array(self.history_meta, dtype=np.int64),
+            row_hash=self.row_hash, pre=self.pre,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CRITICAL ERROR: Could not find {path}.")
+
+        with np.load(path) as data:
+            checkpoints = cls(json.loads(data['params'].item()))
+            checkpoints.teams = data['teams'].tolist()
+            checkpoints.positions = data['positions']
+            checkpoints.ratings = list(data['ratings'])
+            checkpoints.history = list(data['history'])
+            checkpoints.history_sum = list(data['history_sum'])
+            checkpoints.history_meta = data['history_meta'].tolist()
+            checkpoints.row_hash = data['row_hash']
+            checkpoints.pre = data['pre']
+        return checkpoints
+
+
+def replay_elo(df, path, state, k_factor=0.15, reversion=0.01):
+    # run_elo over the whole frame from a fresh `state`, backed by the EloCheckpoints file at
+    # `path`: rows before the restart snapshot keep their stored ratings, the rest is run
+    # week by week to refresh the snapshots, then the file is rewritten. Gives the same
+    # ratings as one full run_elo pass.
+    row_hash = elo_row_hashes(df)
+    params = elo_params(k_factor, reversion, state)
+    checkpoints = EloCheckpoints.load(path) if os.path.exists(path) else None
+    i = checkpoints.restart(row_hash, params) if checkpoints is not None else None
+
+    n = len(df)
+    pre = np.empty((n, 6))
+    if i is None:
+        checkpoints = EloCheckpoints(params)
+        start = 0
+    else:
+        start = checkpoints.restore(i, state)
+        pre[:start] = checkpoints.pre[:start]
+        if start == n == len(checkpoints.row_hash):
+            # Nothing changed, `state` is the final snapshot and the file stays as it is
+            return pre
+
+    with profiling.stage('elo_replay', rows=n - start, from_row=start):
+        rest = df.iloc[start:]
+        home_ids = state.team_ids(rest['TEAM_NAME_home'].tolist())
+        away_ids = state.team_ids(rest['TEAM_NAME_away'].tolist())
+        home_perf = rest['OFF_EFF_home_actual'].to_numpy(dtype=np.float64)
+        away_perf = rest['OFF_EFF_away_actual'].to_numpy(dtype=np.float64)
+        game_pace = rest['PACE_actual'].to_numpy(dtype=np.float64)
+
+        positions = checkpoint_positions(df['GAME_DATE'].to_numpy())
+        begin = start
+        for stop in [*positions[positions >= start].tolist(), n]:
+            week = slice(begin - start, stop - start)
+            pre[begin:stop] = run_elo(state, home_ids[week], away_ids[week], home_perf[week], away_perf[week],
+                                      game_pace[week], k_factor=k_factor, reversion=reversion)
+            checkpoints.add(stop, state)
+            begin = stop
+
+    checkpoints.row_hash = row_hash
+    checkpoints.pre = pre
+    checkpoints.save(path)
+    return pre
+
+
+def add_elo_ratings(df, k_factor=0.15, reversion=0.01, base_elo=1000, state=None, checkpoints=None):
+    # In-memory Elo stage: expects the frame sorted chronologically, returns it with the
+    # *_rating_pre columns and leaves the final team ratings in `state`. With `checkpoints`
+    # (path of an EloCheckpoints file) only the games after the last snapshot before the
+    # first changed row are replayed, see replay_elo.
+    if state is None:
+        state = EloState(base_elo)
+
+    if checkpoints is not None:
+        pre_64 = replay_elo(df, checkpoints, state, k_factor=k_factor, reversion=reversion)
+    else:
+        home_ids = state.team_ids(df['TEAM_NAME_home'].tolist())
+        away_ids = state.team_ids(df['TEAM_NAME_away'].tolist())
+
+        pre_64 = run_elo(
+            state, home_ids, away_ids,
+            df['OFF_EFF_home_actual'].to_numpy(dtype=np.float64),
+            df['OFF_EFF_away_actual'].to_numpy(dtype=np.float64),
+            df['PACE_actual'].to_numpy(dtype=np.float64),
+            k_factor=k_factor, reversion=reversion
+        )
+    pre = pre_64.astype(np.float32)
 
     # Save the data
-    df['home_off_rating_pre'] = home_off_pre
-    df['home_def_rating_pre'] = home_def_pre
-    df['home_pace_rating_pre'] = home_pace_pre
+    df['home_off_rating_pre'] = pre[:, 0]
+    df['home_def_rating_pre'] = pre[:, 1]
+    df['home_pace_rating_pre'] = pre[:, 2]
+
+    df['away_off_rating_pre'] = pre[:, 3]
+    df['away_def_rating_pre'] = pre[:, 4]
+    df['away_pace_rating_pre'] = pre[:, 5]
+    return compact(df)
+
+
+def elo_model(input_csv_name='nba_features.csv', output_csv_name='nba_features_ready_for_model.csv', k_factor = 0.15, reversion = 0.01, base_elo = 1000, csv_debug=False):
+    # Setup paths
+    base_dir = 'data'
+
+    # Check if input file exists
+    if not frame_exists(input_csv_name, base_dir):
+        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {frame_path(input_csv_name, base_dir)}. \n"
+                                f"Make sure the file exists in the '{base_dir}' folder.")
+
+    # Stored frames come back sorted by date, so Elo is calculated chronologically
+    df = read_frame(input_csv_name, base_dir)
+
+    df = add_elo_ratings(df, k_factor=k_factor, reversion=reversion, base_elo=base_elo)
+
+    write_frame(df, output_csv_name, base_dir, csv_debug=csv_debug)
+    return df
+
+
+def elo_sweep(df, k_factors, reversions, base_elo=1000, window=LEAGUE_WINDOW):
+    # Run every (k_factor, reversion) pair of the grid in one chronological pass.
+    # State is a (rating, config, team) tensor, so each game is a handful of numpy ops
+    # over all configs at once instead of one full elo_model run per setting.
+    # Returns the config grid, the pre-game ratings as float32 (configs, games, 6) and the
+    # rating-implied game totals as float32 (configs, games).
+    grid_k, grid_rev = np.meshgrid(np.asarray(k_factors, dtype=np.float64),
+                                   np.asarray(reversions, dtype=np.float64), indexing='ij')
+    k = grid_k.ravel()
+    rev = grid_rev.ravel()
+    keep = 1 - rev
+    n_configs = len(k)
+
+    names = pd.concat([df['TEAM_NAME_home'], df['TEAM_NAME_away']], ignore_index=True)
+    codes, _ = pd.factorize(names)
+    n = len(df)
+    home_ids, away_ids = codes[:n], codes[n:]
+
+    home_perf = df['OFF_EFF_home_actual'].to_numpy(dtype=np.float64)
+    away_perf = df['OFF_EFF_away_actual'].to_numpy(dtype=np.float64)
+    game_pace = df['PACE_actual'].to_numpy(dtype=np.float64)
+
+    ratings = np.full((3, n_configs, codes.max() + 1 if n else 0), float(base_elo))
+    history = np.zeros((window, 3, n_configs))
+    history[0] = base_elo
+    history_sum = np.full((3, n_configs), float(base_elo))
+    count, pos = 1, 1 % window
+
+    pre = np.empty((n_configs, n, 6), dtype=np.float32)
+    implied = np.empty((n_configs, n), dtype=np.float32)
+    err = np.empty((2, 3, n_configs))
+
+    for i in range(n):
+        home, away = home_ids[i], away_ids[i]
+        h = ratings[:, :, home]
+        a = ratings[:, :, away]
+        pre[:, i, :3] = h.T
+        pre[:, i, 3:] = a.T
+
+        avg = history_sum / count
+        exp_h_off = h[0] + (a[1] - avg[1])
+        exp_a_off = a[0] + (h[1] - avg[1])
+        exp_pace = (h[2] + a[2]) / 2
+
+        # Efficiencies are points per 1000 possessions and pace is possessions * 10
+        implied[:, i] = (exp_h_off + exp_a_off) * exp_pace / 10000
+
+        err[0, 0] = err[1, 1] = home_perf[i] - exp_h_off
+        err[0, 1] = err[1, 0] = away_perf[i] - exp_a_off
+        err[:, 2] = game_pace[i] - exp_pace
+
+        new = (np.stack([h, a]) + k * err) * keep + avg * rev
+        new = np.where((new >= 0) & (new <= 3000), new, 1000.0)
+        ratings[:, :, home] = new[0]
+        ratings[:, :, away] = new[1]
+
+        for side in new:
+            if count == window:
+                history_sum -= history[pos]
+            else:
+                count += 1
+            history[pos] = side
+            history_sum += side
+            pos += 1
+            if pos == window:
+                pos = 0
+                history_sum = history.sum(axis=0)
+
+    configs = pd.DataFrame({'k_factor': k, 'reversion': rev})
+    return configs, pre, implied
+
 
-    df['away_off_rating_pre'] = away_off_pre
-    df['away_def_rating_pre'] = away_def_pre
-    df['away_pace_rating_pre'] = away_pace_pre
+def rank_elo_configs(df, k_factors, reversions, base_elo=1000, start_date='2023-10-24'):
+    # Cheap proxy for tuning: RMSE of the rating-implied total against the real total,
+    # scored on the same period the walk-forward evaluation uses (earlier games are burn-in)
+    configs, _, implied = elo_sweep(df, k_factors, reversions, base_elo=base_elo)
 
-    df.to_csv(output_path, index=False)
+    mask = (pd.to_datetime(df['GAME_DATE']) >= pd.Timestamp(start_date)).to_numpy()
+    actual = (df['PTS_home'] + df['PTS_away']).to_numpy(dtype=np.float64)[mask]
+    error = implied[:, mask].astype(np.float64) - actual
 
+    configs['implied_total_rmse'] = np.sqrt(np.mean(error ** 2, axis=1))
+    configs['implied_total_bias'] = error.mean(axis=1)
+    return configs.sort_values('implied_total_rmse').reset_index(drop=True)
@@ -0,0 +1,159 @@
+import pandas as pd
+import numpy as np
+import os
+
+from src.data_engineering import team_game_log
+
+# Stored fields and the feature names they feed (with a home_/away_ prefix)
+INDEX_FIELDS = ['OFF', 'DEF', 'PACE', 'ROLL_PTS', 'ROLL_PACE', 'ROLL_WIN']
+INDEX_FEATURES = ['off_rating_pre', 'def_rating_pre', 'pace_rating_pre', 'roll_pts', 'roll_pace', 'roll_win']
+
+# Team id and day packed into one sorted int64 key, like in add_schedule_features
+KEY_SPAN = 1_000_000
+
+
+def _days(dates):
+    return np.asarray(pd.to_datetime(dates).to_numpy(), dtype='datetime64[D]').astype(np.int64)
+
+
+class FeatureStore:
+    # Point-in-time team features. Ratings and rolling stats only move when the team itself
+    # plays, so a team's state is a step function of time: block t holds the pre-game values
+    # of each of its games, in date order, followed by the state after its last game.
+    # The state as of a date is then the row after the games played strictly before it, one
+    # binary search away, and rest days come from the previous game's date.
+    def __init__(self, default_rest=3, max_rest=7):
+        self.default_rest = default_rest
+        self.max_rest = max_rest
+        self.teams = {}
+        self.days = np.zeros(0, dtype=np.int64)     # game days, per team block
+        self.start = np.zeros(1, dtype=np.int64)    # team t's games are days[start[t]:start[t + 1]]
+        self.values = np.zeros((0, len(INDEX_FIELDS)))  # team t's rows start at start[t] + t
+        self.keys = np.zeros(0, dtype=np.int64)
+        self._tail = []       # (team, day, values) of games appended since the last merge
+        self._tail_last = {}  # team: day of its last appended game
+
+    @classmethod
+    def from_frame(cls, df, state, **kwargs):
+        # df: a features frame with the *_pre ratings and rolling stats (sorted by date),
+        # state: the TeamStateStore after the same games, for the state after each last game
+        store = cls(**kwargs)
+        log = team_game_log(df, columns={
+            field: (f'home_{name}', f'away_{name}') for field, name in zip(INDEX_FIELDS, INDEX_FEATURES)
+        })
+
+        # Team blocks in log order (sorted by name, whether names are strings or categorical)
+        codes, names = pd.factorize(log['TEAM_NAME'])
+        counts = np.bincount(codes, minlength=len(names))
+        store.teams = {name: i for i, name in enumerate(list(names))}
+        store.days = _days(log['GAME_DATE'])
+        store.start = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        post = np.array([[state.team_entry(name)[field] for field in INDEX_FIELDS] for name in store.teams])
+        pre = log[INDEX_FIELDS].to_numpy(dtype=np.float64)
+        store.values = np.insert(pre, store.start[1:], post, axis=0)
+        store._build_keys()
+        return store
+
+    def _build_keys(self):
+        team = np.repeat(np.arange(len(self.teams), dtype=np.int64), np.diff(self.start))
+        self.keys = team * KEY_SPAN + self.days
+
+    def team_ids(self, teams):
+        missing = sorted({team for team in teams if team not in self.teams})
+        if missing:
+            raise ValueError(f"Team not found: {', '.join(missing)}")
+        return np.array([self.teams[team] for team in teams], dtype=np.int64)
+
+    def append(self, team, date, values):
+        # State after a new game of `team` (its current state becomes that game's pre-game row).
+        # O(1): new games go to a tail that is merged into the blocks on the next lookup.
+        day = int(_days([date])[0])
+        t = self.teams.get(team)
+        last = self._tail_last.get(team)
+        if last is None and t is not None and self.start[t + 1] > self.start[t]:
+            last = self.days[self.start[t + 1] - 1]
+        if last is not None and day < last:
+            raise ValueError(f"Game on {pd.Timestamp(date).date()} is older than the last stored game of {team}.")
+
+        if t is None:
+            # New team: nothing is known before its first game
+            t = self.teams[team] = len(self.teams)
+        self._tail.append((t, day, values))
+        self._tail_last[team] = day
+
+    def _merge(self):
+        # Fold the appended games into the sorted team blocks, one pass for the whole tail
+        if not self._tail:
+            return
+        n_old = len(self.start) - 1
+        tail_team = np.array([t for t, _, _ in self._tail], dtype=np.int64)
+        tail_day = np.array([d for _, d, _ in self._tail], dtype=np.int64)
+        tail_values = np.array([v for _, _, v in self._tail], dtype=np.float64).reshape(-1, len(INDEX_FIELDS))
+        new_teams = np.arange(n_old, len(self.teams), dtype=np.int64)
+
+        # Old rows come first and are in team order, the tail is in game order per team, so a
+        # stable sort by team puts every row where it belongs
+        counts = np.diff(self.start)
+        day_team = np.concatenate([np.repeat(np.arange(n_old, dtype=np.int64), counts), tail_team])
+        self.days = np.concatenate([self.days, tail_day])[np.argsort(day_team, kind='stable')]
+
+        value_team = np.concatenate([np.repeat(np.arange(n_old, dtype=np.int64), counts + 1), new_teams, tail_team])
+        values = np.concatenate([self.values, np.full((len(new_teams), len(INDEX_FIELDS)), np.nan), tail_values])
+        self.values = values[np.argsort(value_team, kind='stable')]
+
+        counts = np.bincount(day_team, minlength=len(self.teams))
+        self.start = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._tail = []
+        self._tail_last = {}
+        self._build_keys()
+
+    def as_of_many(self, teams, dates):
+        # Bulk lookup for (team, date) pairs: the state before any game on `date`, and the rest
+        # days (capped, default_rest before a team's first game)
+        self._merge()
+        ids = self.team_ids(list(teams))
+        days = np.broadcast_to(_days(np.atleast_1d(dates)), ids.shape)
+
+        pos = np.searchsorted(self.keys, ids * KEY_SPAN + days, side='left')
+        has_prev = pos > self.start[ids]
+        prev_day = self.days[np.maximum(pos - 1, 0)]
+        rest = np.where(has_prev, np.minimum(days - prev_day, self.max_rest), self.default_rest)
+
+        out = pd.DataFrame(self.values[pos + ids], columns=INDEX_FIELDS)
+        out['REST_DAYS'] = rest
+        return out
+
+    def as_of(self, team, date):
+        return self.as_of_many([team], date).iloc[0].to_dict()
+
+    def pair_features(self, pairs, dates):
+        # {home_/away_ feature: array} for (home, away) pairs played on `dates` (one date or one per pair)
+        columns = {}
+        for side, teams in [('home', [h for h, _ in pairs]), ('away', [a for _, a in pairs])]:
+            state = self.as_of_many(teams, dates)
+            for field, name in zip(INDEX_FIELDS, INDEX_FEATURES):
+                columns[f'{side}_{name}'] = state[field].to_numpy()
+            columns[f'{side}_rest_days'] = state['REST_DAYS'].to_numpy()
+        return columns
+
+    def save(self, path):
+        self._merge()
+        names = sorted(self.teams, key=self.teams.get)
+        np.savez(path, teams=np.array(names), days=self.days, start=self.start, values=self.values,
+                 params=np.array([self.default_rest, self.max_rest]))
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CRITICAL ERROR: Could not find {path}.")
+
+        with np.load(path) as data:
+            default_rest, max_rest = (int(v) for v in data['params'])
+            store = cls(default_rest=default_rest, max_rest=max_rest)
+            store.teams = {name: i for i, name in enumerate(data['teams'].tolist())}
+            store.days = data['days']
+            store.start = data['start']
+            store.values = data['values']
+        store._build_keys()
+        return store
@@ -0,0 +1,75 @@
+import numpy as np
+import xgboost as xgb
+import hashlib
+import json
+import os
+
+# Per-fold walk-forward results, one out-of-fold prediction file and one booster per fit
+CACHE_DIR = os.path.join('models', 'fold_cache')
+MAX_BYTES = 1 << 30
+
+
+class FoldCache:
+    # Disk cache of walk-forward fits. A fit is keyed by everything that decides its output:
+    # the training rows and targets, the rows it predicts, the params, the feature list and
+    # the fold's dates. After a new week of games only the new fold misses.
+    # Least recently used files are evicted once the folder grows past `max_bytes`. Predictions
+    # are read on every run and the boosters only for the last fold, so the old boosters go first.
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, X, y, params, train, test, features, fold_dates):
+        h = hashlib.sha256()
+        for block in [X[train], y[train], X[test]]:
+            h.update(np.ascontiguousarray(block).tobytes())
+        meta = {
+            # n_jobs only changes the speed, the pool overrides it
+            'params': {k: v for k, v in params.items() if k != 'n_jobs'},
+            'features': list(features),
+            'fold_dates': [str(d) for d in fold_dates],
+            'xgboost': xgb.__version__,
+        }
+        h.update(json.dumps(meta, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.cache_dir, f'{key}.{ext}')
+
+    def load(self, key, with_model=False):
+        # (model or None, preds) on a hit, None on a miss (also when the booster is wanted
+        # but was already evicted)
+        preds_path, model_path = self._path(key, 'npy'), self._path(key, 'ubj')
+        if not os.path.exists(preds_path) or (with_model and not os.path.exists(model_path)):
+            return None
+
+        preds = np.load(preds_path)
+        os.utime(preds_path)
+        model = None
+        if with_model:
+            model = xgb.XGBRegressor()
+            model.load_model(model_path)
+            os.utime(model_path)
+        return model, preds
+
+    def save(self, key, model, preds):
+        # Written under a temp name and renamed, safe to call from the pool workers
+        for ext, write in [('ubj', model.save_model), ('npy', lambda path: np.save(path, preds))]:
+            path = self._path(key, ext)
+            tmp = f'{path}.{os.getpid()}.tmp.{ext}'
+            write(tmp)
+            os.replace(tmp, path)
+
+    def size(self):
+        return sum(os.path.getsize(os.path.join(self.cache_dir, f)) for f in os.listdir(self.cache_dir))
+
+    def evict(self):
+        files = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir)]
+        files = [(os.path.getmtime(f), os.path.getsize(f), f) for f in files if os.path.isfile(f)]
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
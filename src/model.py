@@ -2,7 +2,15 @@ import pandas as pd
 import numpy as np
 import xgboost as xgb
 from sklearn.metrics import mean_squared_error
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import os
+import time
+
+from src.storage import frame_exists, frame_path, read_frame, write_frame
+from src.betting import score_slate
+from src import profiling
+from src.feature_store import FeatureStore, INDEX_FIELDS
+from src.team_state import TeamStateStore
 
 FEATURES = [
     'home_off_rating_pre', 'home_def_rating_pre', 'home_pace_rating_pre', 'home_rest_days',
@@ -11,17 +19,40 @@ FEATURES = [
     'away_roll_pts', 'away_roll_pace', 'away_roll_win'
 ]
 
-def load_data(input_file='nba_features_with_rolling.csv'):
+# Columns the training loop and NBAOracle actually use, everything else stays on disk
+TARGETS = ['PTS_home', 'PTS_away']
+ID_COLUMNS = ['GAME_ID', 'GAME_DATE', 'TEAM_NAME_home', 'TEAM_NAME_away']
+STATE_COLUMNS = ['OFF_EFF_home_actual', 'OFF_EFF_away_actual', 'PACE_actual', 'WL_home', 'WL_away']
+LOAD_COLUMNS = ID_COLUMNS + FEATURES + TARGETS + STATE_COLUMNS
+
+# Out-of-fold predictions of every family (see save_oof), the input of the backtests
+OOF_FILES = {'conservative': 'oof_conservative', 'chaos': 'oof_chaos'}
+OOF_COLUMNS = ID_COLUMNS + TARGETS + ['pred_home', 'pred_away', 'pred_total']
+
+def load_data(input_file='nba_features_with_rolling.csv', columns=LOAD_COLUMNS):
     base_dir = 'data'
-    input_path = os.path.join(base_dir, input_file)
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {input_path}.")
-    df = pd.read_csv(input_path)
-    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
-    df = df.sort_values(['GAME_DATE', 'GAME_ID']).reset_index(drop=True)
-    return df
-
-def get_params(mode):
+    if not frame_exists(input_file, base_dir):
+        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {frame_path(input_file, base_dir)}.")
+    # Stored frames keep their dtypes and are already sorted by GAME_DATE, GAME_ID
+    return read_frame(input_file, base_dir, columns=columns)
+
+# Early stopping: rounds without improvement on the validation tail (the most recent
+# VALIDATION_FRACTION of each fold's training rows)
+EARLY_STOPPING_ROUNDS = 50
+VALIDATION_FRACTION = 0.15
+
+def get_params(mode, early_stopping=False, joint=False):
+    # With early_stopping the n_estimators below is only the upper bound, every fold picks
+    # its own tree count (see fit_fold). joint: one model with multi-output trees predicts
+    # both scores instead of a home and an away model.
+    params = _base_params(mode)
+    if early_stopping and params is not None:
+        params['early_stopping_rounds'] = EARLY_STOPPING_ROUNDS
+    if joint and params is not None:
+        params.update({'tree_method': 'hist', 'multi_strategy': 'multi_output_tree'})
+    return params
+
+def _base_params(mode):
     if mode == 'conservative':
         # Conservative: safe, smoothed parameters
         return {
@@ -48,109 +79,404 @@ def get_params(mode):
             'n_jobs': -1
         }
 
-def train_specific_model(df, dates, params, mode='normal'):
-    all_preds = []
-    final_mh = None
-    final_ma = None
+def walk_forward_folds(df, dates, mode='normal'):
+    # (train, test) row slices of every usable weekly fold, in date order.
+    # df is sorted by GAME_DATE, so every fold is a contiguous block found with searchsorted.
+    game_dates = df['GAME_DATE'].to_numpy()
+    bounds = np.searchsorted(game_dates, pd.DatetimeIndex(dates).to_numpy().astype(game_dates.dtype), side='left')
 
+    # Chaos only eats data from Jan 2024 onwards, anchor gets all the data
+    train_start = 0
+    if mode == 'chaos':
+        cutoff_date = pd.Timestamp('2024-01-01').to_datetime64().astype(game_dates.dtype)
+        train_start = int(np.searchsorted(game_dates, cutoff_date, side='left'))
+
+    folds = []
     for i in range(len(dates) - 1):
-        train_end = dates[i]
-        if mode == 'chaos':
-            # Chaos only eats data from Jan 2024 onwards.
-            cutoff_date = pd.Timestamp('2024-01-01')
-            train_df = df[(df['GAME_DATE'] < train_end) & (df['GAME_DATE'] >= cutoff_date)].copy()
-        else:
-            # Anchor gets all the data
-            train_df = df[df['GAME_DATE'] < train_end].copy()
-            
-        test_df = df[(df['GAME_DATE'] >= train_end) & (df['GAME_DATE'] < dates[i+1])].copy()
+        train = slice(train_start, max(train_start, int(bounds[i])))
+        test = slice(int(bounds[i]), int(bounds[i + 1]))
         
-        if len(test_df) == 0: continue
-        if len(train_df) < 50: continue # Skip if not enough recent data
+        if test.stop == test.start: continue
+        if train.stop - train.start < 50: continue # Skip if not enough recent data
+        folds.append((train, test))
+    return folds
 
-        # Train
-        mh = xgb.XGBRegressor(**params)
-        mh.fit(train_df[FEATURES], train_df['PTS_home'])
-        
-        ma = xgb.XGBRegressor(**params)
-        ma.fit(train_df[FEATURES], train_df['PTS_away'])
-        
-        # Predict
-        test_df['pred_home'] = mh.predict(test_df[FEATURES])
-        test_df['pred_away'] = ma.predict(test_df[FEATURES])
-        all_preds.append(test_df)
-        
-        final_mh = mh
-        final_ma = ma
+def training_matrix(df, joint=False):
+    # Features as one float32 array (what XGBoost uses internally anyway) and the targets.
+    # Fold slices of these are views, no per-fold copy or pandas conversion.
+    # Targets are {'home', 'away'}, or a single (n, 2) 'joint' target for the joint model.
+    if not df['GAME_DATE'].is_monotonic_increasing:
+        raise ValueError("Walk-forward needs the frame sorted by GAME_DATE.")
+    X = np.ascontiguousarray(df[FEATURES].to_numpy(dtype=np.float32))
+    if joint:
+        return X, {'joint': np.ascontiguousarray(df[TARGETS].to_numpy(dtype=np.float32))}
+    targets = {'home': df['PTS_home'].to_numpy(dtype=np.float32), 'away': df['PTS_away'].to_numpy(dtype=np.float32)}
+    return X, targets
+
+def side_predictions(preds):
+    # {target: per-fold predictions} -> (home list, away list), the joint target holds both columns
+    if 'joint' in preds:
+        return [p[:, 0] for p in preds['joint']], [p[:, 1] for p in preds['joint']]
+    return preds['home'], preds['away']
+
+def family_models(models):
+    # {target: model} -> (home model, away model); a joint model comes as (model, None)
+    if 'joint' in models:
+        return models['joint'], None
+    return models['home'], models['away']
+
+def predict_sides(model_home, model_away, X):
+    # (home, away) predictions of one family, model_away is None for a joint model
+    if model_away is None:
+        preds = model_home.predict(X)
+        return preds[:, 0], preds[:, 1]
+    return model_home.predict(X), model_away.predict(X)
+
+def early_stopped_trees(X, y, params, train, val_fraction=VALIDATION_FRACTION):
+    # Fit on the older rows of the fold, stop on its most recent games and return the best
+    # tree count (time-ordered, so the tail plays the part of "next week")
+    split = train.stop - max(1, int((train.stop - train.start) * val_fraction))
+    probe = xgb.XGBRegressor(**params)
+    probe.fit(X[train.start:split], y[train.start:split],
+              eval_set=[(X[split:train.stop], y[split:train.stop])], verbose=False)
+    return probe.best_iteration + 1
+
+def fit_fold(X, y, params, train, test=None, xgb_model=None):
+    # params with 'early_stopping_rounds': find the fold's tree count on its validation tail,
+    # then refit on all of its rows with exactly that many trees, so the booster is already
+    # trimmed. Continued (xgb_model) fits keep their given tree count.
+    early_stopping = params.get('early_stopping_rounds')
+    params = {k: v for k, v in params.items() if k != 'early_stopping_rounds'}
+    if early_stopping and xgb_model is None:
+        n_trees = early_stopped_trees(X, y, {**params, 'early_stopping_rounds': early_stopping}, train)
+        params['n_estimators'] = n_trees
 
-    if not all_preds: return None, None, 0.0
+    model = xgb.XGBRegressor(**params)
+    model.fit(X[train], y[train], xgb_model=xgb_model)
+    preds = model.predict(X[test]) if test is not None else None
+    return model, preds
 
-    full_res = pd.concat(all_preds)
+def fold_key(cache, X, y, params, train, test, game_dates):
+    # Cache key of one fit, None when running without a cache
+    if cache is None:
+        return None
+    fold_dates = (game_dates[train.start], game_dates[test.start], game_dates[test.stop - 1])
+    return cache.key(X, y, params, train, test, FEATURES, fold_dates)
+
+def cached_fit(X, y, params, train, test, cache=None, key=None, keep_model=True):
+    # fit_fold through the fold cache. Without keep_model only the predictions are read back,
+    # so a hit may return None for the model.
+    if cache is not None:
+        hit = cache.load(key, with_model=keep_model)
+        if hit is not None:
+            return hit
+    model, preds = fit_fold(X, y, params, train, test)
+    if cache is not None:
+        cache.save(key, model, preds)
+    return model, preds
+
+def with_feature_names(*models):
+    # Fits run on the bare float32 array, the served models get the names back so they
+    # check the columns of the FEATURES frames NBAOracle predicts on
+    for model in models:
+        if model is not None:
+            model.get_booster().feature_names = FEATURES
+    return models
+
+def collect_predictions(df, folds, preds_home, preds_away):
+    # Out-of-fold frame (in fold order) and the RMSE of the predicted totals
+    test_idx = np.concatenate([np.arange(test.start, test.stop) for _, test in folds])
+    full_res = df.iloc[test_idx].copy()
+    full_res['pred_home'] = np.concatenate(preds_home)
+    full_res['pred_away'] = np.concatenate(preds_away)
     full_res['pred_total'] = full_res['pred_home'] + full_res['pred_away']
     rmse = np.sqrt(mean_squared_error(full_res['PTS_home'] + full_res['PTS_away'], full_res['pred_total']))
-    
-    return final_mh, final_ma, rmse
+    return full_res, rmse
+
+def save_oof(full_res, oof_file, base_dir='data'):
+    write_frame(full_res[[c for c in OOF_COLUMNS if c in full_res]].reset_index(drop=True), oof_file, base_dir)
+
+def train_specific_model(df, dates, params, mode='normal', warm_start=False, warm_trees=100, refit_every=8,
+                         cache=None, oof_file=None):
+    # Walk-forward: for every week train on everything before it, predict the week.
+    # With warm_start=True only every `refit_every`-th fold is trained from scratch; the folds
+    # in between continue the previous boosters (xgb_model) with `warm_trees` extra trees
+    # fitted on just the games added since the last update.
+    # A FoldCache skips the from-scratch fits it has already seen (warm folds depend on the
+    # previous fold, so the warm-started mode does not use it).
+    # Returns (model_home, model_away, rmse), or (joint model, None, rmse) for joint params.
+    # oof_file: where to store the out-of-fold predictions (save_oof).
+    folds = walk_forward_folds(df, dates, mode)
+    if not folds: return None, None, 0.0
+    if warm_start: cache = None
+
+    X, targets = training_matrix(df, joint='multi_strategy' in params)
+    game_dates = df['GAME_DATE'].to_numpy()
+
+    models = dict.fromkeys(targets)
+    preds = {target: [] for target in targets}
+    last_stop = None
+    folds_since_refit = 0
+
+    for i, (train, test) in enumerate(folds):
+        warm = warm_start and last_stop is not None and folds_since_refit < refit_every - 1
+        with profiling.stage('fold', family=mode, fold=i, warm=warm, rows=train.stop - train.start,
+                             test_rows=test.stop - test.start):
+            for target, y in targets.items():
+                if warm:
+                    new = slice(max(last_stop, train.start), train.stop)
+                    if new.stop > new.start:
+                        warm_params = {**params, 'n_estimators': warm_trees}
+                        models[target], _ = fit_fold(X, y, warm_params, new, xgb_model=models[target].get_booster())
+                    p = models[target].predict(X[test])
+                else:
+                    # Train and predict (or read both back from the cache)
+                    keep = cache is None or i == len(folds) - 1
+                    models[target], p = cached_fit(X, y, params, train, test, cache,
+                                                   fold_key(cache, X, y, params, train, test, game_dates), keep)
+                preds[target].append(p)
+        folds_since_refit = folds_since_refit + 1 if warm else 0
+        last_stop = train.stop
+
+    if cache is not None:
+        cache.evict()
+    full_res, rmse = collect_predictions(df, folds, *side_predictions(preds))
+    if oof_file is not None:
+        save_oof(full_res, oof_file)
+    return (*family_models(models), rmse)
+
+# Training data shared with the pool workers, set once per worker process
+_WORKER_DATA = {}
+
+def _init_worker(X, targets):
+    _WORKER_DATA['X'] = X
+    _WORKER_DATA['targets'] = targets
+
+def _worker_fit(params, target, train, test, keep_model, cache=None, key=None):
+    (model, preds), stats = profiling.measure(
+        cached_fit, _WORKER_DATA['X'], _WORKER_DATA['targets'][target], params, train, test, cache, key)
+    return preds, model if keep_model else None, stats
+
+def parallel_walk_forward(df, dates, families, n_workers, threads_per_model=2, cache=None, oof_files=None):
+    # Every (family, fold, target) fit is independent in the from-scratch walk-forward, so they
+    # all go into one process pool. Each model gets `threads_per_model` threads instead of
+    # n_jobs=-1, so workers x threads matches the cores instead of oversubscribing them.
+    # Fits found in the FoldCache are read back here and never reach the pool.
+    # families: {name: (params, mode)}, all separate or all joint.
+    # Returns {name: (model_home, model_away, rmse)} (model_away None for joint models).
+    # oof_files: {name: file} for the out-of-fold predictions (save_oof).
+    X, targets = training_matrix(df, joint=any('multi_strategy' in params for params, _ in families.values()))
+    game_dates = df['GAME_DATE'].to_numpy()
+
+    plan = {name: walk_forward_folds(df, dates, mode) for name, (_, mode) in families.items()}
+    tasks = []
+    results = {}
+    for name, folds in plan.items():
+        params = {**families[name][0], 'n_jobs': threads_per_model}
+        for i, (train, test) in enumerate(folds):
+            for target, y in targets.items():
+                keep = i == len(folds) - 1
+                key = fold_key(cache, X, y, params, train, test, game_dates)
+                hit = cache.load(key, with_model=keep) if cache is not None else None
+                if hit is not None:
+                    results[(name, i, target)] = (hit[1], hit[0], None)
+                    continue
+                # Rough cost, so the biggest fits are started first
+                cost = (train.stop - train.start) * params.get('n_estimators', 100) * 2 ** params.get('max_depth', 6)
+                tasks.append((cost, (name, i, target), (params, target, train, test, keep, cache, key)))
+    tasks.sort(key=lambda task: task[0], reverse=True)
 
-def train_and_evaluate(df, start_date='2023-10-24'):
+    if tasks:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(X, targets)) as pool:
+            futures = {pool.submit(_worker_fit, *args): key for _, key, args in tasks}
+            for future in as_completed(futures):
+                name, i, target = futures[future]
+                results[(name, i, target)] = future.result()
+                # Timings measured in the worker (peak RSS is the worker process')
+                train = plan[name][i][0]
+                profiling.record('fold_fit', family=name, fold=i, target=target, rows=train.stop - train.start,
+                                 **results[(name, i, target)][2])
+    if cache is not None:
+        cache.evict()
+
+    # Gather the out-of-fold predictions back in fold order
+    output = {}
+    for name, folds in plan.items():
+        if not folds:
+            output[name] = (None, None, 0.0)
+            continue
+        preds = {target: [results[(name, i, target)][0] for i in range(len(folds))] for target in targets}
+        full_res, rmse = collect_predictions(df, folds, *side_predictions(preds))
+        if oof_files and name in oof_files:
+            save_oof(full_res, oof_files[name])
+        last = len(folds) - 1
+        output[name] = (*family_models({target: results[(name, last, target)][1] for target in targets}), rmse)
+    return output
+
+def train_and_evaluate(df, start_date='2023-10-24', warm_start=False, warm_trees=100, refit_every=8,
+                       n_workers=None, threads_per_model=2, cache=None, early_stopping=False, joint=False,
+                       save_predictions=False):
+    # n_workers=None uses every core (cores // threads_per_model workers). One worker, or the
+    # warm-started mode whose folds depend on each other, trains sequentially.
+    # cache: a FoldCache, so a weekly rerun only trains the new fold.
+    # early_stopping: every fold picks its tree count on a validation tail, the tree counts and
+    # prediction latency of the served models are printed at the end.
+    # joint: one multi-output model per family and fold instead of a home and an away model,
+    # the families then come back as (joint model, None).
+    # save_predictions: keep the out-of-fold predictions of both families (OOF_FILES) for backtests.
+    oof_files = OOF_FILES if save_predictions else {}
     dates = pd.date_range(start=pd.Timestamp(start_date), end=df['GAME_DATE'].max(), freq='W-SUN')
-    
-    # 1. Conservative (full history)
-    cons_h, cons_a, cons_rmse = train_specific_model(df, dates, get_params('conservative'), mode='conservative')
-    print(f'Conservative RMSE: {cons_rmse}')
+    if n_workers is None:
+        n_workers = max(1, (os.cpu_count() or 1) // threads_per_model)
 
-    # 2. Chaos (modern era only)
-    chaos_h, chaos_a, chaos_rmse = train_specific_model(df, dates, get_params('chaos'), mode='chaos')
-    print(f'Chaos RMSE: {chaos_rmse}')
-    
-    return (cons_h, cons_a), (chaos_h, chaos_a), (cons_rmse, chaos_rmse)
+    if n_workers > 1 and not warm_start:
+        results = parallel_walk_forward(df, dates, {
+            'conservative': (get_params('conservative', early_stopping, joint), 'conservative'),
+            'chaos': (get_params('chaos', early_stopping, joint), 'chaos'),
+        }, n_workers=n_workers, threads_per_model=threads_per_model, cache=cache, oof_files=oof_files)
+        cons_h, cons_a, cons_rmse = results['conservative']
+        chaos_h, chaos_a, chaos_rmse = results['chaos']
+        print(f'Conservative RMSE: {cons_rmse}')
+        print(f'Chaos RMSE: {chaos_rmse}')
+    else:
+        walk = {'warm_start': warm_start, 'warm_trees': warm_trees, 'refit_every': refit_every, 'cache': cache}
+
+        # 1. Conservative (full history)
+        cons_h, cons_a, cons_rmse = train_specific_model(df, dates, get_params('conservative', early_stopping, joint),
+                                                         mode='conservative', oof_file=oof_files.get('conservative'),
+                                                         **walk)
+        print(f'Conservative RMSE: {cons_rmse}')
+
+        # 2. Chaos (modern era only)
+        chaos_h, chaos_a, chaos_rmse = train_specific_model(df, dates, get_params('chaos', early_stopping, joint),
+                                                            mode='chaos', oof_file=oof_files.get('chaos'), **walk)
+        print(f'Chaos RMSE: {chaos_rmse}')
+
+    cons_models, chaos_models = with_feature_names(cons_h, cons_a), with_feature_names(chaos_h, chaos_a)
+    if early_stopping:
+        print(serving_report(cons_models, chaos_models, df[FEATURES]).to_string(index=False))
+    return cons_models, chaos_models, (cons_rmse, chaos_rmse)
+
+def serving_report(cons_models, chaos_models, X, batch_size=1000, repeats=20):
+    # Trees per served booster and prediction latency per family (all of its boosters): one
+    # game, and a batch of `batch_size` games
+    rows = []
+    one, batch = X.tail(1), X.tail(batch_size)
+    for family, models in [('conservative', cons_models), ('chaos', chaos_models)]:
+        if models[0] is None:
+            continue
+        row = {'family': family}
+        sides = ['joint'] if models[1] is None else ['home', 'away']
+        for side, model in zip(sides, models):
+            row[f'trees_{side}'] = model.get_booster().num_boosted_rounds()
+        for name, data in [('single_ms', one), ('batch_ms', batch)]:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                predict_sides(*models, data)
+            row[name] = (time.perf_counter() - start) / repeats * 1000
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def compare_walk_forward(df, start_date='2023-10-24', warm_trees=100, refit_every=8):
+    # Accuracy/time trade-off of the warm-started walk-forward against weekly full refits
+    dates = pd.date_range(start=pd.Timestamp(start_date), end=df['GAME_DATE'].max(), freq='W-SUN')
+    rows = []
+    for mode in ['conservative', 'chaos']:
+        for warm_start in [False, True]:
+            start = time.perf_counter()
+            _, _, rmse = train_specific_model(df, dates, get_params(mode), mode=mode, warm_start=warm_start,
+                                              warm_trees=warm_trees, refit_every=refit_every)
+            rows.append({'family': mode, 'walk_forward': 'warm' if warm_start else 'scratch',
+                         'rmse': rmse, 'seconds': time.perf_counter() - start})
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False))
+    return report
+
+def compare_joint_training(df, start_date='2023-10-24', early_stopping=False):
+    # Time and RMSE of one joint home/away model per fold against the separate two models
+    dates = pd.date_range(start=pd.Timestamp(start_date), end=df['GAME_DATE'].max(), freq='W-SUN')
+    rows = []
+    for mode in ['conservative', 'chaos']:
+        for joint in [False, True]:
+            start = time.perf_counter()
+            _, _, rmse = train_specific_model(df, dates, get_params(mode, early_stopping, joint), mode=mode)
+            rows.append({'family': mode, 'targets': 'joint' if joint else 'separate',
+                         'rmse': rmse, 'seconds': time.perf_counter() - start})
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False))
+    return report
 
 class NBAOracle:
-    def __init__(self, df, cons_models, chaos_models):
+    # cons_models / chaos_models: (home model, away model), or (joint model, None)
+    def __init__(self, df, cons_models, chaos_models, state=None, store=None):
         self.df = df
         self.cons_h, self.cons_a = cons_models
         self.chaos_h, self.chaos_a = chaos_models
+        self.state = state
+        self.store = store
         self.index = self._build_index()
         
     def _build_index(self):
-        cols = ['GAME_DATE', 'TEAM', 'OFF', 'DEF', 'PACE', 'ROLL_PTS', 'ROLL_PACE', 'ROLL_WIN']
-        
-        h = self.df[['GAME_DATE', 'TEAM_NAME_home', 'home_off_rating_pre', 'home_def_rating_pre', 
-                     'home_pace_rating_pre', 'home_roll_pts', 'home_roll_pace', 'home_roll_win']].copy()
-        h.columns = cols
-        
-        a = self.df[['GAME_DATE', 'TEAM_NAME_away', 'away_off_rating_pre', 'away_def_rating_pre', 
-                     'away_pace_rating_pre', 'away_roll_pts', 'away_roll_pace', 'away_roll_win']].copy()
-        a.columns = cols
-        
-        return pd.concat([h, a]).sort_values('GAME_DATE').groupby('TEAM').last().to_dict('index')
+        # Each team's current state, i.e. after its last game (ratings and rolling
+        # windows already include that game's result), and the point-in-time store
+        # behind every feature lookup
+        if self.state is None:
+            self.state = TeamStateStore.from_frame(self.df)
+        if self.store is None:
+            self.store = FeatureStore.from_frame(self.df, self.state)
+        return self.state.to_index()
+
+    def ingest_game(self, game):
+        # Add one finished game and refresh only the two teams involved
+        self.state.ingest(game)
+        for team in (game['TEAM_NAME_home'], game['TEAM_NAME_away']):
+            entry = self.state.team_entry(team)
+            self.index[team] = entry
+            self.store.append(team, entry['GAME_DATE'], [entry[field] for field in INDEX_FIELDS])
+
+    def feature_matrix(self, pairs, as_of=None):
+        # One FEATURES-ordered frame for a list of (home, away) pairs, as of one date or one
+        # date per pair (default: today). Past dates get the pre-game state of that day.
+        as_of = pd.to_datetime('today') if as_of is None else as_of
+        columns = self.store.pair_features(list(pairs), as_of)
+        return pd.DataFrame({feature: columns[feature] for feature in FEATURES})
+
+    def predict_many(self, pairs, as_of=None):
+        # Score a whole slate (or every pairing, e.g. itertools.permutations(oracle.index, 2))
+        # with one call per booster. Rest days are counted up to `as_of` (default: today),
+        # which can also be a date per pair, e.g. to re-price a past slate.
+        pairs = list(pairs)
+        X = self.feature_matrix(pairs, as_of=as_of)
+
+        result = pd.DataFrame({'home': [h for h, _ in pairs], 'away': [a for _, a in pairs]})
+        for family, mh, ma in [('cons', self.cons_h, self.cons_a), ('chaos', self.chaos_h, self.chaos_a)]:
+            result[f'{family}_home'], result[f'{family}_away'] = predict_sides(mh, ma, X)
+            result[f'{family}_total'] = result[f'{family}_home'] + result[f'{family}_away']
+        return result
     
-    def predict(self, home, away):
+    def score_lines(self, lines, rmses, as_of=None, kelly_scale=1.0):
+        # Over/under probabilities, EV and Kelly stakes for every offered total (a
+        # betting.LINE_COLUMNS table, several books per game are fine). Each game is predicted
+        # once; with a GAME_DATE column every game is priced as of its own date.
+        if 'GAME_DATE' in lines:
+            games = lines[['home', 'away', 'GAME_DATE']].drop_duplicates()
+            as_of = games['GAME_DATE'].to_numpy()
+        else:
+            games = lines[['home', 'away']].drop_duplicates()
+
+        predictions = self.predict_many(zip(games['home'], games['away']), as_of=as_of)
+        if 'GAME_DATE' in lines:
+            predictions['GAME_DATE'] = games['GAME_DATE'].to_numpy()
+        return score_slate(predictions, lines, rmses, kelly_scale)
+
+    def predict(self, home, away, as_of=None):
         if home not in self.index or away not in self.index:
             print(f"Error: Team not found ({home} or {away})")
             return
-            
-        h_stats, a_stats = self.index[home], self.index[away]
-        today = pd.to_datetime('today')
-        
-        h_rest = min((today - h_stats['GAME_DATE']).days, 7)
-        a_rest = min((today - a_stats['GAME_DATE']).days, 7)
-        
-        input_data = {
-            'home_off_rating_pre': [h_stats['OFF']], 'home_def_rating_pre': [h_stats['DEF']],
-            'home_pace_rating_pre': [h_stats['PACE']], 'home_rest_days': [h_rest],
-            'away_off_rating_pre': [a_stats['OFF']], 'away_def_rating_pre': [a_stats['DEF']],
-            'away_pace_rating_pre': [a_stats['PACE']], 'away_rest_days': [a_rest],
-            'home_roll_pts': [h_stats['ROLL_PTS']], 'home_roll_pace': [h_stats['ROLL_PACE']], 'home_roll_win': [h_stats['ROLL_WIN']],
-            'away_roll_pts': [a_stats['ROLL_PTS']], 'away_roll_pace': [a_stats['ROLL_PACE']], 'away_roll_win': [a_stats['ROLL_WIN']]
-        }
-        
-        df_in = pd.DataFrame(input_data)
-        
-        # Predictions
-        c_ph = self.cons_h.predict(df_in)[0]
-        c_pa = self.cons_a.predict(df_in)[0]
-        k_ph = self.chaos_h.predict(df_in)[0]
-        k_pa = self.chaos_a.predict(df_in)[0]
+
+        p = self.predict_many([(home, away)], as_of=as_of).iloc[0]
         
-        print(f"Conservative model: {home} {c_ph:.1f} - {c_pa:.1f} {away} (Total: {c_ph+c_pa:.1f})")
-        print(f"Chaos model: {home} {k_ph:.1f} - {k_pa:.1f} {away} (Total: {k_ph+k_pa:.1f})")
\ No newline at end of file
+        print(f"Conservative model: {home} {p['cons_home']:.1f} - {p['cons_away']:.1f} {away} (Total: {p['cons_total']:.1f})")
+        print(f"Chaos model: {home} {p['chaos_home']:.1f} - {p['chaos_away']:.1f} {away} (Total: {p['chaos_total']:.1f})")
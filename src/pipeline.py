@@ -0,0 +1,161 @@
+import pandas as pd
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+from src.data_engineering import process_games
+from src.elo_model import CHECKPOINTS_FILE, add_elo_ratings
+from src.player_stats import PLAYERS_FILE, add_player_aggregates
+from src.profiling import record, stage as profile_stage
+from src.rolling_stats import compute_rolling_stats
+from src.schema import read_games
+from src.storage import frame_path, read_frame, write_frame
+
+STATE_FILE = '.pipeline_state.json'
+
+
+def _src_modules(name, found):
+    # The src module `name` and every src module it reaches through its imports
+    if name in found or not (name == 'src' or name.startswith('src.')) or name not in sys.modules:
+        return
+    module = sys.modules[name]
+    found[name] = module
+    for value in list(vars(module).values()):
+        dep = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+        if isinstance(dep, str):
+            _src_modules(dep, found)
+
+
+def code_hash(func):
+    # Hash the whole module of func and everything from src it imports, directly or through
+    # other modules, so edits to helper functions (schema, data_engineering, ...) also
+    # invalidate the stage. Functions from outside src (pd.read_csv) are keyed by name and
+    # library version.
+    found = {}
+    _src_modules(func.__module__, found)
+    h = hashlib.sha256()
+    if not found:
+        library = sys.modules.get(func.__module__.split('.')[0])
+        h.update(f"{func.__module__}.{func.__qualname__} {getattr(library, '__version__', '')}".encode())
+    for name in sorted(found):
+        with open(found[name].__file__, 'rb') as f:
+            h.update(name.encode() + b'\0' + f.read())
+    return h.hexdigest()
+
+
+class Stage:
+    # inputs: {param: file in base_dir} read by the stage besides the upstream frame. Their
+    # content is part of the stage key and their path is passed to func as that param.
+    def __init__(self, name, func, output_file, params=None, inputs=None):
+        self.name = name
+        self.func = func
+        self.output_file = output_file
+        self.params = params or {}
+        self.inputs = inputs or {}
+
+    def code_hash(self):
+        return code_hash(self.func)
+
+
+class PipelineRunner:
+    # Runs a chain of DataFrame -> DataFrame stages. Each stage gets a key made of its
+    # upstream key, name, params and code (see code_hash); the first upstream key covers the
+    # source file, its reader and the storage layer. A stage whose key matches the last run
+    # and whose output file still exists is skipped. Frames are handed over in memory and
+    # only read back from disk when a stage after a skipped one needs to run.
+    def __init__(self, source_file, stages, base_dir='data', csv_debug=False, reader=pd.read_csv):
+        self.source_file = source_file
+        self.reader = reader
+        self.stages = stages
+        self.base_dir = base_dir
+        self.csv_debug = csv_debug
+        self.state_path = os.path.join(base_dir, STATE_FILE)
+
+    def _file_hash(self, path):
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        with open(self.state_path, 'w') as f:
+            json.dump(state, f, indent=2)
+
+    def _read(self, file_name):
+        return read_frame(file_name, self.base_dir)
+
+    def _write(self, df, file_name):
+        write_frame(df, file_name, self.base_dir, csv_debug=self.csv_debug)
+
+    def run(self, force=False, verbose=True):
+        source_path = os.path.join(self.base_dir, self.source_file)
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(f"CRITICAL ERROR: Could not find {source_path}. \n"
+                                    f"Make sure you ran 'main.py' from the project root "
+                                    f"and that the file exists in the '{self.base_dir}' folder.")
+
+        state = self._load_state()
+        # The source content, how it is read and how the stage outputs are stored
+        key = hashlib.sha256(json.dumps({'source': self._file_hash(source_path), 'reader': code_hash(self.reader),
+                                         'storage': code_hash(write_frame)}, sort_keys=True).encode()).hexdigest()
+        df = None
+        last_file = self.source_file
+
+        for stage in self.stages:
+            inputs = {param: os.path.join(self.base_dir, file_name) for param, file_name in stage.inputs.items()}
+            meta = json.dumps({'upstream': key, 'name': stage.name, 'params': stage.params,
+                               'inputs': {param: self._file_hash(path) for param, path in inputs.items()},
+                               'code': stage.code_hash()}, sort_keys=True)
+            key = hashlib.sha256(meta.encode()).hexdigest()
+            output_path = frame_path(stage.output_file, self.base_dir)
+
+            if not force and state.get(stage.name) == key and os.path.exists(output_path):
+                record(stage.name, skipped=True)
+                if verbose:
+                    print(f'[{stage.name}] up to date, skipped')
+                df = None
+                last_file = stage.output_file
+                continue
+
+            with profile_stage(stage.name, skipped=False) as stats:
+                if df is None:
+                    df = self._read(last_file) if last_file != self.source_file else self.reader(source_path)
+
+                df = stage.func(df, **stage.params, **inputs)
+                self._write(df, stage.output_file)
+                stats['rows'] = len(df)
+            last_file = stage.output_file
+
+            state[stage.name] = key
+            self._save_state(state)
+            if verbose:
+                print(f'[{stage.name}] rebuilt ({len(df)} rows)')
+
+        if df is None:
+            df = self._read(last_file)
+        return df
+
+
+def feature_pipeline(k_factor=0.15, reversion=0.01, base_elo=1000, csv_debug=False, base_dir='data'):
+    stages = [
+        Stage('process_games', process_games, 'nba_features'),
+        Stage('elo', add_elo_ratings, 'nba_features_ready_for_model',
+              {'k_factor': k_factor, 'reversion': reversion, 'base_elo': base_elo,
+               'checkpoints': os.path.join(base_dir, CHECKPOINTS_FILE)}),
+        Stage('rolling_stats', compute_rolling_stats, 'nba_features_with_rolling'),
+    ]
+    # Player aggregates only when the scraper has written the player log
+    if os.path.exists(os.path.join(base_dir, PLAYERS_FILE)):
+        stages.append(Stage('player_aggregates', add_player_aggregates, 'nba_features_with_players',
+                            inputs={'players_path': PLAYERS_FILE}))
+    return PipelineRunner('nba_games_2019_2025.csv', stages, base_dir=base_dir, csv_debug=csv_debug,
+                          reader=read_games)
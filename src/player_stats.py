@@ -0,0 +1,171 @@
+import pandas as pd
+import numpy as np
+
+from src.schema import SIDES, column_dtype
+
+# Player log written by scrape_raw_data (one row per player per game, sorted by date)
+PLAYERS_FILE = 'nba_players_2019_2025.csv'
+PLAYER_COLUMNS = ['SEASON_ID', 'PLAYER_ID', 'TEAM_ID', 'GAME_ID', 'GAME_DATE', 'MIN', 'PTS']
+PLAYER_DTYPES = {'SEASON_ID': np.int32, 'PLAYER_ID': np.int64, 'TEAM_ID': np.int64, 'GAME_ID': np.int64,
+                 'MIN': np.float32, 'PTS': np.float32}
+
+# Rows per chunk read from the player log; memory is bounded by this, not by the file size
+CHUNK_ROWS = 200_000
+
+# A team's top scorers (season points so far) and the average minutes that count as rotation
+TOP_SCORERS = 3
+ROTATION_MINUTES = 15.0
+
+# Per team per game, from the team's season so far and the players who played the game:
+#   availability:   share of the team's season minutes held by the players who played
+#   top_scorers:    share of the team's TOP_SCORERS leading scorers who played
+#   rotation_depth: players who played and average ROTATION_MINUTES or more
+# They describe the lineup, which is only known at tip-off, so they sit next to the model
+# features rather than in FEATURES. A team's first game of a season gets the defaults.
+AGGREGATES = ['availability', 'top_scorers', 'rotation_depth']
+AGGREGATE_DEFAULTS = {'availability': 1.0, 'top_scorers': 1.0, 'rotation_depth': 8}
+
+
+class PlayerState:
+    # Season-to-date minutes, points and games per (team, player) in growable arrays, the
+    # same slot scheme as EloState. Reset at the start of every season.
+    def __init__(self):
+        self.reset()
+
+    def reset(self, season=None):
+        self.season = season
+        self.players = {}
+        self.teams = {}
+        self.team = np.zeros(0, dtype=np.int64)
+        self.minutes = np.zeros(0)
+        self.points = np.zeros(0)
+        self.games = np.zeros(0, dtype=np.int64)
+        self.team_minutes = np.zeros(0)
+
+    def _slots(self, table, keys):
+        ids = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            ids[i] = table.setdefault(key, len(table))
+        return ids
+
+    def slots(self, team_ids, player_ids):
+        teams = self._slots(self.teams, team_ids.tolist())
+        players = self._slots(self.players, list(zip(team_ids.tolist(), player_ids.tolist())))
+
+        grow = len(self.players) - len(self.minutes)
+        if grow > 0:
+            self.team = np.concatenate([self.team, np.zeros(grow, dtype=np.int64)])
+            self.minutes = np.concatenate([self.minutes, np.zeros(grow)])
+            self.points = np.concatenate([self.points, np.zeros(grow)])
+            self.games = np.concatenate([self.games, np.zeros(grow, dtype=np.int64)])
+        self.team[players] = teams
+        if len(self.teams) > len(self.team_minutes):
+            self.team_minutes = np.concatenate([self.team_minutes, np.zeros(len(self.teams) - len(self.team_minutes))])
+        return teams, players
+
+
+def _day_aggregates(state, day, top_n, rotation_minutes):
+    # Aggregates of one date's games from the state before that date, then the state update.
+    # A team plays at most once a day, so the team is the group.
+    teams, players = state.slots(day['TEAM_ID'].to_numpy(), day['PLAYER_ID'].to_numpy())
+    local, team_slots = pd.factorize(teams)
+    n_teams = len(team_slots)
+
+    prior = state.games[players]
+    average = np.divide(state.minutes[players], prior, out=np.zeros(len(players)), where=prior > 0)
+    season_minutes = state.team_minutes[team_slots]
+    availability = np.bincount(local, weights=state.minutes[players], minlength=n_teams) / np.where(
+        season_minutes > 0, season_minutes, np.nan)
+    depth = np.bincount(local, weights=average >= rotation_minutes, minlength=n_teams)
+
+    # Top scorers of every team playing today, ranked within the team by season points
+    # (ties go to the player who appeared first in the season, lexsort is stable)
+    local_of = np.full(len(state.teams), -1)
+    local_of[team_slots] = np.arange(n_teams)
+    candidates = np.flatnonzero((local_of[state.team] >= 0) & (state.points > 0))
+    order = candidates[np.lexsort((-state.points[candidates], state.team[candidates]))]
+    team_of = state.team[order]
+    top = order[np.arange(len(order)) - np.searchsorted(team_of, team_of, side='left') < top_n]
+    n_top = np.bincount(local_of[state.team[top]], minlength=n_teams)
+    present = np.bincount(local, weights=np.isin(players, top), minlength=n_teams)
+    top_scorers = np.divide(present, n_top, out=np.full(n_teams, np.nan), where=n_top > 0)
+
+    first_row = np.unique(local, return_index=True)[1]
+    result = pd.DataFrame({
+        'GAME_ID': day['GAME_ID'].to_numpy()[first_row],
+        'TEAM_ID': day['TEAM_ID'].to_numpy()[first_row],
+        'availability': availability,
+        'top_scorers': top_scorers,
+        'rotation_depth': np.where(season_minutes > 0, depth, np.nan),
+    })
+
+    minutes = day['MIN'].to_numpy(dtype=np.float64)
+    state.minutes[players] += minutes
+    state.points[players] += day['PTS'].to_numpy(dtype=np.float64)
+    state.games[players] += 1
+    state.team_minutes[team_slots] += np.bincount(local, weights=minutes, minlength=n_teams)
+    return result
+
+
+def _aggregate_rows(state, rows, top_n, rotation_minutes):
+    # Complete dates only, in order; a new SEASON_ID resets the state
+    if len(rows) == 0:
+        return None
+    days = rows['GAME_DATE'].to_numpy()
+    bounds = np.concatenate([[0], np.flatnonzero(days[1:] != days[:-1]) + 1, [len(rows)]])
+    seasons = rows['SEASON_ID'].to_numpy()
+
+    results = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if seasons[start] != state.season:
+            state.reset(seasons[start])
+        results.append(_day_aggregates(state, rows.iloc[start:stop], top_n, rotation_minutes))
+    return pd.concat(results, ignore_index=True)
+
+
+def stream_player_aggregates(path, chunk_rows=CHUNK_ROWS, top_n=TOP_SCORERS, rotation_minutes=ROTATION_MINUTES):
+    # One row per (GAME_ID, TEAM_ID) with the AGGREGATES, read in chunks of `chunk_rows`.
+    # Dates are processed whole: the rows of a chunk's last date are held back and finished
+    # with the next chunk. Only the current season's state is kept, so memory stays flat
+    # however many seasons the file holds. The log must be sorted by GAME_DATE.
+    state = PlayerState()
+    results = []
+    carry = None
+    for chunk in pd.read_csv(path, usecols=PLAYER_COLUMNS, dtype=PLAYER_DTYPES, chunksize=chunk_rows):
+        chunk['GAME_DATE'] = pd.to_datetime(chunk['GAME_DATE'])
+        chunk[['MIN', 'PTS']] = chunk[['MIN', 'PTS']].fillna(0)
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+
+        days = chunk['GAME_DATE'].to_numpy()
+        if (days[1:] < days[:-1]).any():
+            raise ValueError(f"{path} is not sorted by GAME_DATE, player aggregates need a chronological log.")
+
+        cut = int(np.searchsorted(days, days[-1], side='left'))
+        carry = chunk.iloc[cut:]
+        results.append(_aggregate_rows(state, chunk.iloc[:cut], top_n, rotation_minutes))
+
+    if carry is not None:
+        results.append(_aggregate_rows(state, carry, top_n, rotation_minutes))
+    results = [result for result in results if result is not None]
+    if not results:
+        return pd.DataFrame(columns=['GAME_ID', 'TEAM_ID'] + AGGREGATES)
+    return pd.concat(results, ignore_index=True)
+
+
+def add_player_aggregates(df, players_path, chunk_rows=CHUNK_ROWS, top_n=TOP_SCORERS,
+                          rotation_minutes=ROTATION_MINUTES):
+    # In-memory stage: home_/away_ AGGREGATES looked up by (GAME_ID, TEAM_ID_<side>), games
+    # without player rows get the defaults
+    aggregates = stream_player_aggregates(players_path, chunk_rows, top_n, rotation_minutes)
+    index = pd.MultiIndex.from_arrays([aggregates['GAME_ID'].to_numpy(), aggregates['TEAM_ID'].to_numpy()])
+
+    for side in SIDES:
+        rows = index.get_indexer(pd.MultiIndex.from_arrays([df['GAME_ID'].to_numpy(),
+                                                             df[f'TEAM_ID_{side}'].to_numpy(dtype=np.int64)]))
+        for name in AGGREGATES:
+            values = aggregates[name].to_numpy(dtype=np.float64)[rows]
+            values[rows < 0] = np.nan
+            column = f'{side}_{name}'
+            df[column] = np.nan_to_num(values, nan=AGGREGATE_DEFAULTS[name]).astype(column_dtype(column))
+    return df
@@ -0,0 +1,158 @@
+import pandas as pd
+import contextlib
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows, no peak RSS there
+    resource = None
+
+REPORTS_DIR = 'reports'
+
+# The profiler of the current run, see RunProfiler.__enter__. Without one stage() and record()
+# do nothing, so library code can be instrumented unconditionally.
+_ACTIVE = None
+
+
+# Peak RSS of the measurements in progress (stages, measure calls), innermost last
+_OPEN_PEAKS = []
+
+
+def peak_rss_mb():
+    # High-water mark of this process' resident memory since the last _reset_peak (Linux),
+    # or since the process started where it can't be reset
+    try:
+        with open('/proc/self/status') as f:
+            return int(re.search(r'VmHWM:\s+(\d+)', f.read()).group(1)) / 1024
+    except (OSError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def _reset_peak():
+    # Start a new high-water mark at the current RSS (Linux only, a no-op elsewhere)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _fold_peak():
+    # Credit the high-water mark so far to every open measurement
+    peak = peak_rss_mb()
+    if peak is not None:
+        _OPEN_PEAKS[:] = [max(p, peak) for p in _OPEN_PEAKS]
+
+
+@contextlib.contextmanager
+def _peak_window():
+    # Yields a dict that gets 'peak_rss_mb', the peak RSS reached while the block ran, so a
+    # stage or fold shows its own peak rather than the process peak so far. The mark is
+    # reset at entry; nested windows hand their peak up to the enclosing ones.
+    _fold_peak()
+    _reset_peak()
+    _OPEN_PEAKS.append(0.0)
+    out = {}
+    try:
+        yield out
+    finally:
+        _fold_peak()
+        peak = _OPEN_PEAKS.pop()
+        out['peak_rss_mb'] = peak if peak_rss_mb() is not None else None
+
+
+def measure(func, *args, **kwargs):
+    # (result, wall/cpu/peak RSS of the call), for work that runs in pool workers
+    wall, cpu = time.perf_counter(), time.process_time()
+    with _peak_window() as memory:
+        result = func(*args, **kwargs)
+    return result, {'wall_s': time.perf_counter() - wall, 'cpu_s': time.process_time() - cpu, **memory}
+
+
+class RunProfiler:
+    # Wall time, CPU time, peak RSS (reached during the stage, see _peak_window) and row
+    # counts per stage of one run, written out as a JSON and CSV report. With profile_dir every top-level stage also gets a cProfile dump
+    # (<stage>.prof, open with pstats or snakeviz).
+    def __init__(self, profile_dir=None):
+        self.profile_dir = profile_dir
+        self.records = []
+        self.started = pd.Timestamp.now()
+        self.depth = 0
+
+    def __enter__(self):
+        global _ACTIVE
+        self._previous, _ACTIVE = _ACTIVE, self
+        return self
+
+    def __exit__(self, *exc):
+        global _ACTIVE
+        _ACTIVE = self._previous
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        # Yields the record, so the stage can fill in e.g. rows once it knows them
+        record = {'stage': name, **fields}
+        profile = None
+        if self.profile_dir and self.depth == 0:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profile = cProfile.Profile()
+            profile.enable()
+
+        self.depth += 1
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            with _peak_window() as memory:
+                yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall
+            record['cpu_s'] = time.process_time() - cpu
+            record['peak_rss_mb'] = memory.get('peak_rss_mb')
+            self.depth -= 1
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(os.path.join(self.profile_dir, re.sub(r'\W+', '_', name) + '.prof'))
+            self.records.append(record)
+
+    def record(self, name, **fields):
+        self.records.append({'stage': name, **fields})
+
+    def report(self):
+        return pd.DataFrame(self.records)
+
+    def save(self, out_dir=REPORTS_DIR):
+        # reports/run_<start time>.json (run info + records) and .csv (records)
+        os.makedirs(out_dir, exist_ok=True)
+        name = os.path.join(out_dir, f"run_{self.started.strftime('%Y%m%d_%H%M%S')}")
+        with open(name + '.json', 'w') as f:
+            json.dump({
+                'started': self.started.isoformat(),
+                'finished': pd.Timestamp.now().isoformat(),
+                'argv': sys.argv,
+                'stages': self.records,
+            }, f, indent=2, default=str)
+        self.report().to_csv(name + '.csv', index=False)
+        return name + '.json', name + '.csv'
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    # RunProfiler.stage of the active run, or a plain record dict when nothing is profiled
+    if _ACTIVE is None:
+        yield {'stage': name, **fields}
+    else:
+        with _ACTIVE.stage(name, **fields) as record:
+            yield record
+
+
+def record(name, **fields):
+    if _ACTIVE is not None:
+        _ACTIVE.record(name, **fields)
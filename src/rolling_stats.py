@@ -1,77 +1,103 @@
 import pandas as pd
 import numpy as np
-import os
 
-def add_rolling_stats(input_csv_name='nba_features_ready_for_model.csv', output_csv_name='nba_features_with_rolling.csv'):
-    base_dir = 'data'
-    input_path = os.path.join(base_dir, input_csv_name)
-    output_path = os.path.join(base_dir, output_csv_name)
+from src.data_engineering import team_game_log, split_sides
+from src.schema import compact
+from src.storage import frame_exists, frame_path, read_frame, write_frame
 
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {input_path}. \n"
-                                f"Make sure you ran the Elo module first.")
+# Rolling window length and the values used before a team has a full window
+ROLL_WINDOW = 5
+ROLL_DEFAULTS = {'PTS': 112.0, 'PACE': 98.0, 'WIN': 0.50}
+
+# Extra windows and EWMA spans computed next to the model's 5-game window
+ROLL_WINDOWS = [3, 5, 10, 20]
+EWM_SPANS = [5, 10]
+
+def rolling_features(log, stats, windows=ROLL_WINDOWS, ewm_spans=EWM_SPANS, include_current=False):
+    # One pass over a team log sorted by team and date (see team_game_log).
+    # Window means come from a single cumulative sum per stat: the mean of the previous w games
+    # is (cs[i] - cs[i - w]) / w, valid once the team has w earlier games. EWMAs run as one
+    # grouped ewm over all stats per span. With include_current=False (the default) only
+    # earlier games are used, which is what prevents data leakage; True gives the state
+    # right after each game.
+    team = pd.factorize(log['TEAM_NAME'])[0]
+    position = np.arange(len(log))
+    first = np.ones(len(log), dtype=bool)
+    first[1:] = team[1:] != team[:-1]
+    group_start = np.maximum.accumulate(np.where(first, position, 0))
+
+    shift = 1 if include_current else 0
+    end = position + shift
+    history = end - group_start
 
-    df = pd.read_csv(input_path)
-    if 'GAME_DATE' in df.columns:
-        df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    out = {}
+    for stat in stats:
+        values = log[stat].to_numpy(dtype=np.float64)
+        cs = np.concatenate([[0.0], np.cumsum(values)])
+        for w in windows:
+            means = (cs[end] - cs[np.maximum(end - w, 0)]) / w
+            out[(stat, 'roll', w)] = np.where(history >= w, means, np.nan)
 
+    if ewm_spans:
+        frame = log[stats].astype(np.float64)
+        if not include_current:
+            frame = frame.groupby(team).shift(1)
+        grouped = frame.groupby(team)
+        for span in ewm_spans:
+            ewm = grouped.ewm(span=span).mean().droplevel(0).sort_index()
+            for stat in stats:
+                out[(stat, 'ewm', span)] = ewm[stat].to_numpy()
+
+    return out
+
+def feature_name(side, stat, kind, size):
+    # The model's 5-game columns keep their original names (home_roll_pts, ...)
+    if kind == 'roll' and size == ROLL_WINDOW:
+        return f'{side}_roll_{stat.lower()}'
+    return f'{side}_{kind}_{stat.lower()}_{size}'
+
+def compute_rolling_stats(df, windows=ROLL_WINDOWS, ewm_spans=EWM_SPANS):
+    # In-memory version of the stage, used by add_rolling_stats and the pipeline runner
     # Stack home and away games for correct analisys
     # This is done to ensure the rolling averages are calculated across both home and away games
-    
-    # Extract only relevant columns for both home and away
-    home_df = df[['GAME_ID', 'GAME_DATE', 'TEAM_NAME_home', 'PTS_home', 'PACE_actual', 'WL_home']].copy()
-    home_df.columns = ['GAME_ID', 'GAME_DATE', 'TEAM_NAME', 'PTS', 'PACE', 'WL']
-    home_df['IS_HOME'] = 1
-
-    away_df = df[['GAME_ID', 'GAME_DATE', 'TEAM_NAME_away', 'PTS_away', 'PACE_actual', 'WL_away']].copy()
-    away_df.columns = ['GAME_ID', 'GAME_DATE', 'TEAM_NAME', 'PTS', 'PACE', 'WL']
-    away_df['IS_HOME'] = 0
-
-    team_logs = pd.concat([home_df, away_df], axis=0)
-    team_logs = team_logs.sort_values(['TEAM_NAME', 'GAME_DATE']).reset_index(drop=True)
-
-    # Convert W/L to numeric (1/0)
-    team_logs['WIN_FLG'] = team_logs['WL'].apply(lambda x: 1 if x == 'W' else 0)
-
-    # Calculate rolling stats
-    # Group by team and shift(1) to ensure current game data is not used (which would be data leakage)
-    grouped = team_logs.groupby('TEAM_NAME')
-
-    team_logs['roll_pts_5'] = grouped['PTS'].transform(lambda x: x.shift(1).rolling(5).mean())
-    team_logs['roll_pace_5'] = grouped['PACE'].transform(lambda x: x.shift(1).rolling(5).mean())
-    team_logs['roll_win_pct_5'] = grouped['WIN_FLG'].transform(lambda x: x.shift(1).rolling(5).mean())
-
-    # Fill NaN (first 5 games) with conservative estimates
-    team_logs['roll_pts_5'] = team_logs['roll_pts_5'].fillna(112.0)
-    team_logs['roll_pace_5'] = team_logs['roll_pace_5'].fillna(98.0)
-    team_logs['roll_win_pct_5'] = team_logs['roll_win_pct_5'].fillna(0.50)
-
-    # Merge it back to main df
-    df = df.merge(
-        team_logs[['GAME_ID', 'TEAM_NAME', 'roll_pts_5', 'roll_pace_5', 'roll_win_pct_5']],
-        left_on=['GAME_ID', 'TEAM_NAME_home'],
-        right_on=['GAME_ID', 'TEAM_NAME'],
-        how='left'
-    )
-    df.rename(columns={
-        'roll_pts_5': 'home_roll_pts', 
-        'roll_pace_5': 'home_roll_pace', 
-        'roll_win_pct_5': 'home_roll_win'
-    }, inplace=True)
-    df.drop(columns=['TEAM_NAME'], inplace=True)
-
-    df = df.merge(
-        team_logs[['GAME_ID', 'TEAM_NAME', 'roll_pts_5', 'roll_pace_5', 'roll_win_pct_5']],
-        left_on=['GAME_ID', 'TEAM_NAME_away'],
-        right_on=['GAME_ID', 'TEAM_NAME'],
-        how='left'
-    )
-    df.rename(columns={
-        'roll_pts_5': 'away_roll_pts', 
-        'roll_pace_5': 'away_roll_pace', 
-        'roll_win_pct_5': 'away_roll_win'
-    }, inplace=True)
-    df.drop(columns=['TEAM_NAME'], inplace=True)
-
-    df.to_csv(output_path, index=False)    
+    log = team_game_log(df, {
+        'PTS': ('PTS_home', 'PTS_away'),
+        'PACE': ('PACE_actual', 'PACE_actual'),
+        # Convert W/L to numeric (1/0)
+        'WIN': ((df['WL_home'] == 'W').to_numpy(dtype=np.float64), (df['WL_away'] == 'W').to_numpy(dtype=np.float64)),
+    })
+
+    features = rolling_features(log, list(ROLL_DEFAULTS), windows=windows, ewm_spans=ewm_spans)
+
+    # Home columns first, then away, matching the old merge order
+    new_cols = [feature_name(side, *key) for side in ['home', 'away'] for key in features]
+    first_cols = [f'{side}_roll_{stat.lower()}' for side in ['home', 'away'] for stat in ROLL_DEFAULTS
+                  if f'{side}_roll_{stat.lower()}' in new_cols]
+    ordered = first_cols + [c for c in new_cols if c not in first_cols]
+    position = {c: i for i, c in enumerate(ordered)}
+
+    # Reattach by position and fill NaN (first games) with conservative estimates, straight
+    # into one float32 block; each feature's float64 values are dropped once written
+    block = np.empty((len(df), len(ordered)), dtype=np.float32)
+    for stat, kind, size in list(features):
+        values = np.nan_to_num(features.pop((stat, kind, size)), nan=ROLL_DEFAULTS[stat])
+        home, away = split_sides(log, values, len(df))
+        block[:, position[feature_name('home', stat, kind, size)]] = home
+        block[:, position[feature_name('away', stat, kind, size)]] = away
+
+    df = df.drop(columns=[c for c in ordered if c in df.columns])
+    return compact(pd.concat([df, pd.DataFrame(block, columns=ordered, index=df.index)], axis=1))
+
+def add_rolling_stats(input_csv_name='nba_features_ready_for_model.csv', output_csv_name='nba_features_with_rolling.csv', csv_debug=False):
+    base_dir = 'data'
+
+    if not frame_exists(input_csv_name, base_dir):
+        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {frame_path(input_csv_name, base_dir)}. \n"
+                                f"Make sure you ran the Elo module first.")
+
+    df = read_frame(input_csv_name, base_dir)
+
+    df = compute_rolling_stats(df)
+
+    write_frame(df, output_csv_name, base_dir, csv_debug=csv_debug)
     return df
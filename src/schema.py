@@ -0,0 +1,84 @@
+import pandas as pd
+import numpy as np
+import re
+
+# Column projection and compact dtypes shared by the pipeline stages. The raw games file has
+# ~55 columns, the stages only ever use the ones below; everything is stored with the
+# smallest dtype that holds it exactly (or, for model features, as exactly as the float32
+# matrix XGBoost is trained on).
+
+SIDES = ['home', 'away']
+TEAM_COLUMNS = ['TEAM_NAME_home', 'TEAM_NAME_away']
+
+# Raw box-score columns per side that process_games needs (possessions, efficiencies, W/L)
+RAW_SIDE_COLUMNS = ['TEAM_ID', 'TEAM_NAME', 'WL', 'FGA', 'FTA', 'OREB', 'TOV', 'PTS']
+RAW_COLUMNS = ['SEASON_ID', 'GAME_ID', 'GAME_DATE'] + [f'{c}_{side}' for side in SIDES for c in RAW_SIDE_COLUMNS]
+
+# Counting stats fit in int16, schedule counts (rest capped at 7 days, games in the last
+# 7 days) in int8
+BOX_STATS = ['MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA', 'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK',
+             'TOV', 'PF', 'PTS', 'PLUS_MINUS']
+INT16_COLUMNS = [f'{stat}_{side}' for side in SIDES for stat in BOX_STATS]
+INT8_COLUMNS = [f'{side}_{name}' for side in SIDES
+                for name in ['rest_days', 'b2b', 'games_last_4', 'games_last_7', '3in4', 'rotation_depth']]
+INT32_COLUMNS = ['SEASON_ID', 'TEAM_ID_home', 'TEAM_ID_away']
+CATEGORY_COLUMNS = ['WL_home', 'WL_away']
+
+# Model inputs (pre-game ratings, rolling windows, player aggregates) and intermediates
+# nothing reads back.
+# OFF_EFF_*_actual and PACE_actual stay float64: every Elo run (add_elo_ratings,
+# TeamStateStore.from_frame) starts from them and has to give the same ratings.
+FLOAT32_PATTERN = re.compile(r'^(POSS_home|POSS_away|GAME_PACE|(home|away)_((off|def|pace)_rating_pre|(roll|ewm)_.*|availability|top_scorers))$')
+
+
+def team_dtype(df):
+    # One categorical dtype for both team columns (sorted names), so home and away codes
+    # are comparable and a stacked team log stays categorical
+    names = set()
+    for column in TEAM_COLUMNS:
+        names.update(df[column].dropna().unique().tolist())
+    return pd.CategoricalDtype(sorted(names))
+
+
+def column_dtype(column):
+    if column in INT16_COLUMNS:
+        return np.dtype(np.int16)
+    if column in INT8_COLUMNS:
+        return np.dtype(np.int8)
+    if column in INT32_COLUMNS:
+        return np.dtype(np.int32)
+    if column in CATEGORY_COLUMNS:
+        return 'category'
+    if FLOAT32_PATTERN.match(column):
+        return np.dtype(np.float32)
+    return None
+
+
+def compact(df):
+    # df with the columns the schema knows in their compact dtypes (df itself when there is
+    # nothing to cast). Integer targets only apply to integer columns, so a box score with
+    # gaps stays float; unknown columns are left alone. The frame is rebuilt in one go:
+    # replacing columns one by one would keep the old consolidated blocks alive behind the
+    # columns that are not cast.
+    dtypes = {}
+    if all(column in df.columns for column in TEAM_COLUMNS):
+        teams = team_dtype(df)
+        dtypes.update({column: teams for column in TEAM_COLUMNS if df[column].dtype != teams})
+
+    for column in df.columns:
+        dtype = column_dtype(column)
+        if column in dtypes or dtype is None or df[column].dtype == dtype:
+            continue
+        if isinstance(dtype, np.dtype) and dtype.kind == 'i' and not pd.api.types.is_integer_dtype(df[column]):
+            continue
+        dtypes[column] = dtype
+
+    if not dtypes:
+        return df
+    return pd.DataFrame({column: df[column].astype(dtypes[column]) if column in dtypes else df[column]
+                         for column in df.columns}, index=df.index)
+
+
+def read_games(path, columns=RAW_COLUMNS):
+    # The raw merged games CSV, projected to the pipeline's columns and compacted
+    return compact(pd.read_csv(path, usecols=columns))
@@ -0,0 +1,171 @@
+import pandas as pd
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from src.teams import build_alias_map, resolve_team
+
+# Requests arriving within BATCH_WINDOW_MS of the first one in a batch share one predict call
+BATCH_WINDOW_MS = 2.0
+MAX_BATCH = 1024
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class MicroBatcher:
+    # Collects single-game requests and scores them together: the first request of a batch
+    # starts a short timer, everything that comes in meanwhile (up to max_batch) goes into
+    # the same predict_many call, i.e. one predict per booster. Scoring runs in a worker
+    # thread, so the event loop keeps accepting requests while a batch is scored.
+    def __init__(self, oracle, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+        self.oracle = oracle
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.pending = []
+        self.timer = None
+        self.batches = 0
+        # Scoring tasks in flight, referenced until done so they can't be collected mid-run
+        self.tasks = set()
+
+    async def predict(self, home, away, as_of):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((home, away, as_of, future))
+        if len(self.pending) >= self.max_batch:
+            self._dispatch()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self._score(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _score(self, batch):
+        pairs = [(home, away) for home, away, _, _ in batch]
+        dates = [as_of for _, _, as_of, _ in batch]
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.oracle.predict_many(pairs, as_of=dates))
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # A client that disconnected has cancelled its future, the rest still get their result
+        self.batches += 1
+        for row, (*_, future) in zip(result.to_dict('records'), batch):
+            if not future.done():
+                future.set_result({key: value if key in ('home', 'away') else float(value) for key, value in row.items()})
+
+
+class PredictionService:
+    # Minimal HTTP/1.1 (keep-alive) JSON service on top of one loaded NBAOracle:
+    #   GET  /predict?home=BOS&away=mia[&date=YYYY-MM-DD]
+    #   POST /predict  {"home": ..., "away": ..., "date": ...} or a list of those
+    #   GET  /teams, GET /health
+    def __init__(self, oracle, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+        self.oracle = oracle
+        self.aliases = build_alias_map(oracle.index)
+        self.batcher = MicroBatcher(oracle, window_ms, max_batch)
+        self.requests = 0
+
+    def _game(self, query):
+        home = resolve_team(str(query.get('home', '')), self.aliases)
+        away = resolve_team(str(query.get('away', '')), self.aliases)
+        if home is None or away is None:
+            missing = [query.get(side, '') for side, team in [('home', home), ('away', away)] if team is None]
+            raise ValueError(f"Team not found: {', '.join(map(str, missing))}")
+        if home == away:
+            raise ValueError(f"A team can't play itself: {home}")
+        as_of = pd.Timestamp(query['date']) if query.get('date') else pd.Timestamp.today().normalize()
+        return home, away, as_of
+
+    async def handle(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, {'status': 'ok', 'requests': self.requests, 'batches': self.batcher.batches}
+        if url.path == '/teams':
+            return 200, {'teams': sorted(self.oracle.index)}
+        if url.path != '/predict':
+            return 404, {'error': f'Unknown path {url.path}'}
+
+        if method not in ('GET', 'POST'):
+            return 405, {'error': f'Method {method} not allowed'}
+
+        # A malformed body (JSONDecodeError is a ValueError) is the client's error too
+        try:
+            if method == 'GET':
+                games = [{key: values[0] for key, values in parse_qs(url.query).items()}]
+            else:
+                payload = json.loads(body or b'null')
+                games = payload if isinstance(payload, list) else [payload]
+            games = [self._game(game) for game in games]
+        except (ValueError, TypeError, AttributeError) as e:
+            return 400, {'error': str(e)}
+
+        self.requests += len(games)
+        results = await asyncio.gather(*(self.batcher.predict(*game) for game in games))
+        return 200, results[0] if method == 'GET' else results
+
+    async def _connection(self, reader, writer):
+        # One client connection, any number of requests on it
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload = await self.handle(method, target, body)
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+                data = json.dumps(payload, default=str).encode()
+                close = headers.get('connection', '').lower() == 'close'
+                writer.write(
+                    f'HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n'
+                    f'Content-Type: application/json\r\nContent-Length: {len(data)}\r\n'
+                    f'Connection: {"close" if close else "keep-alive"}\r\n\r\n'.encode() + data)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8000):
+        return await asyncio.start_server(self._connection, host, port, backlog=1024)
+
+
+def serve(oracle, host='127.0.0.1', port=8000, window_ms=BATCH_WINDOW_MS):
+    async def run():
+        server = await PredictionService(oracle, window_ms).start(host, port)
+        print(f'Serving predictions on http://{host}:{port}/predict (Ctrl+C to stop)')
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print('Stopped')
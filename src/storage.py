@@ -0,0 +1,58 @@
+import pandas as pd
+import os
+
+# Intermediate frames are stored as Parquet (typed, columnar, keeps the sort order) when
+# pyarrow is installed. Without it everything falls back to the old CSV files.
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+BASE_DIR = 'data'
+
+
+def frame_name(file_name):
+    # 'nba_features.csv' and 'nba_features' both map to 'nba_features'
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def frame_path(file_name, base_dir=BASE_DIR):
+    ext = '.parquet' if HAS_PARQUET else '.csv'
+    return os.path.join(base_dir, frame_name(file_name) + ext)
+
+
+def frame_exists(file_name, base_dir=BASE_DIR):
+    name = frame_name(file_name)
+    return any(os.path.exists(os.path.join(base_dir, name + ext)) for ext in ['.parquet', '.csv'])
+
+
+def write_frame(df, file_name, base_dir=BASE_DIR, csv_debug=False):
+    name = frame_name(file_name)
+    if HAS_PARQUET:
+        df.to_parquet(os.path.join(base_dir, name + '.parquet'), index=False)
+
+    # CSV is only written on request (handy for eyeballing the data) or as the fallback
+    if csv_debug or not HAS_PARQUET:
+        df.to_csv(os.path.join(base_dir, name + '.csv'), index=False)
+
+
+def read_frame(file_name, base_dir=BASE_DIR, columns=None):
+    # Column-projected read. Parquet keeps dtypes and row order, the CSV fallback
+    # re-parses dates and re-sorts like the stages used to.
+    name = frame_name(file_name)
+    parquet_path = os.path.join(base_dir, name + '.parquet')
+    csv_path = os.path.join(base_dir, name + '.csv')
+
+    if HAS_PARQUET and os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path, columns=columns)
+
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CRITICAL ERROR: Could not find {name} in '{base_dir}'.")
+
+    df = pd.read_csv(csv_path, usecols=columns)
+    if 'GAME_DATE' in df.columns:
+        df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+        if 'GAME_ID' in df.columns:
+            df = df.sort_values(['GAME_DATE', 'GAME_ID']).reset_index(drop=True)
+    return df
@@ -0,0 +1,154 @@
+import pandas as pd
+import numpy as np
+
+from src.data_scraper import merge_team_log
+from src.teams import TEAM_ABBREVIATIONS
+
+# Regular season window the synthetic schedule is spread over (late October to mid April)
+SEASON_START = '10-22'
+SEASON_DAYS = 175
+
+LOG_COLUMNS = ['SEASON_ID', 'TEAM_ID', 'TEAM_ABBREVIATION', 'TEAM_NAME', 'GAME_ID', 'GAME_DATE', 'MATCHUP', 'WL',
+               'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB',
+               'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'PLUS_MINUS', 'VIDEO_AVAILABLE']
+
+
+def synthetic_teams(n_teams):
+    # The real teams first, numbered expansion teams after that
+    names = list(TEAM_ABBREVIATIONS)[:n_teams]
+    codes = [TEAM_ABBREVIATIONS[name][0] for name in names]
+    for i in range(len(names), n_teams):
+        names.append(f'Expansion Team {i + 1}')
+        codes.append(f'X{i + 1:02d}')
+    return names, codes
+
+
+def _schedule(rng, n_teams, games_per_team, season_days=SEASON_DAYS):
+    # Rounds of random pairings, every team plays at most once per round. Each round gets its
+    # own day range, so a team's games are in round order and never on the same day.
+    half = n_teams // 2
+    n_rounds = -(-games_per_team * n_teams // (2 * half))
+    pairs = rng.random((n_rounds, n_teams)).argsort(axis=1)[:, :2 * half]
+    home, away = pairs[:, 0::2].ravel(), pairs[:, 1::2].ravel()
+
+    spacing = max(season_days, n_rounds) / n_rounds
+    round_day = np.floor(np.arange(n_rounds) * spacing).astype(np.int64)
+    day = np.repeat(round_day, half) + rng.integers(0, max(1, int(spacing)), size=n_rounds * half)
+    order = np.argsort(day, kind='stable')
+    return home[order], away[order], day[order]
+
+
+def _box_score(rng, possessions, points):
+    # Team box score around the possessions and points of each game, consistent with itself
+    # (PTS = 2 * FGM + FG3M + FTM) and with the possession estimate used downstream
+    n = len(points)
+    fga = np.maximum(np.rint(possessions * 0.88 + rng.normal(0, 3, n)), 40).astype(np.int64)
+    fta = np.maximum(np.rint(fga * 0.25 + rng.normal(0, 4, n)), 0).astype(np.int64)
+    fg3a = rng.binomial(fga, 0.4)
+    fg3m = rng.binomial(fg3a, 0.36)
+    ftm = rng.binomial(fta, 0.78)
+    fg2m = np.clip(np.rint((points - ftm - 3 * fg3m) / 2), 0, fga - fg3a).astype(np.int64)
+    fgm = fg2m + fg3m
+    oreb = rng.poisson(10.5, n)
+    dreb = rng.poisson(34, n)
+    return {
+        'FGM': fgm, 'FGA': fga, 'FG3M': fg3m, 'FG3A': fg3a, 'FTM': ftm, 'FTA': fta,
+        'OREB': oreb, 'DREB': dreb, 'REB': oreb + dreb, 'AST': rng.binomial(fgm, 0.6),
+        'STL': rng.poisson(7.7, n), 'BLK': rng.poisson(4.9, n),
+        'TOV': np.maximum(np.rint(possessions - fga - 0.44 * fta + oreb), 2).astype(np.int64),
+        'PF': rng.poisson(19.5, n), 'PTS': 2 * fg2m + 3 * fg3m + ftm,
+    }
+
+
+def synthetic_league_log(n_teams=30, n_seasons=6, games_per_team=82, last_season=2024, seed=0):
+    # LeagueGameLog-shaped team log (two rows per game, same columns and MATCHUP format as the
+    # API) for `n_seasons` seasons ending with the one starting in `last_season`. More seasons
+    # go further back in time, so the walk-forward dates of the real data keep working.
+    # Teams have an offense, defense and pace that drift from season to season.
+    rng = np.random.default_rng(seed)
+    names, codes = synthetic_teams(n_teams)
+    names, codes = np.array(names, dtype=object), np.array(codes, dtype=object)
+    offense, defense = rng.normal(0, 3, n_teams), rng.normal(0, 3, n_teams)
+    pace = rng.normal(99, 2, n_teams)
+
+    seasons = []
+    for year in range(last_season - n_seasons + 1, last_season + 1):
+        offense = 0.7 * offense + rng.normal(0, 2, n_teams)
+        defense = 0.7 * defense + rng.normal(0, 2, n_teams)
+        pace = 99 + 0.8 * (pace - 99) + rng.normal(0, 1, n_teams)
+
+        home, away, day = _schedule(rng, n_teams, games_per_team)
+        n = len(home)
+        possessions = (pace[home] + pace[away]) / 2 + rng.normal(0, 4, n)
+        home_eff = 112 + 1.5 + offense[home] - defense[away] + rng.normal(0, 9, n)
+        away_eff = 112 + offense[away] - defense[home] + rng.normal(0, 9, n)
+        box_home = _box_score(rng, possessions, np.rint(possessions * home_eff / 100))
+        box_away = _box_score(rng, possessions, np.rint(possessions * away_eff / 100))
+
+        # No overtime in the synthetic league, ties go to the home team by a free throw
+        tied = box_home['PTS'] == box_away['PTS']
+        for stat in ['FTM', 'FTA', 'PTS']:
+            box_home[stat] = box_home[stat] + tied
+
+        dates = (pd.Timestamp(f'{year}-{SEASON_START}') + pd.to_timedelta(day, unit='D')).strftime('%Y-%m-%d')
+        game_ids = np.char.add(f'002{year % 100:02d}', np.char.zfill(np.arange(1, n + 1).astype(str), 5))
+        for side, team, opponent, box, sign in [('home', home, away, box_home, 1), ('away', away, home, box_away, -1)]:
+            margin = sign * (box_home['PTS'] - box_away['PTS'])
+            matchup = ' vs. ' if side == 'home' else ' @ '
+            log = pd.DataFrame({
+                'SEASON_ID': f'2{year}',
+                'TEAM_ID': 1610612737 + team,
+                'TEAM_ABBREVIATION': codes[team],
+                'TEAM_NAME': names[team],
+                'GAME_ID': game_ids,
+                'GAME_DATE': dates,
+                'MATCHUP': codes[team] + matchup + codes[opponent],
+                'WL': np.where(margin > 0, 'W', 'L'),
+                'MIN': 240,
+                **box,
+                'PLUS_MINUS': margin,
+                'VIDEO_AVAILABLE': 1,
+            })
+            for made, attempted in [('FGM', 'FGA'), ('FG3M', 'FG3A'), ('FTM', 'FTA')]:
+                log[made.replace('M', '_PCT', 1)] = np.round(
+                    np.divide(log[made], log[attempted], out=np.zeros(n), where=log[attempted] > 0), 3)
+            seasons.append(log[LOG_COLUMNS])
+
+    return pd.concat(seasons, ignore_index=True)
+
+
+def synthetic_player_log(team_log, roster_size=15, seed=0):
+    # Player log (one row per player per game, sorted by date like scrape_raw_data writes it)
+    # for a synthetic_league_log. Every team has a fixed roster with a minutes and a scoring
+    # share per player; each player misses a game now and then, the rest split the team's 240
+    # minutes and its points in proportion to their shares.
+    rng = np.random.default_rng(seed)
+    n = len(team_log)
+    team = team_log['TEAM_ID'].to_numpy() - 1610612737
+    slot = np.arange(roster_size)
+    minutes_share = np.exp(-slot / 8.0)
+    n_teams = team.max() + 1
+    scoring = minutes_share * rng.lognormal(0, 0.3, (n_teams, roster_size))
+
+    played = rng.random((n, roster_size)) < np.where(slot < 12, 0.9, 0.3)
+    played[:, :5] |= ~played.any(axis=1, keepdims=True)
+    weights = minutes_share * played
+    minutes = np.rint(240 * weights / weights.sum(axis=1, keepdims=True))
+    pvals = scoring[team] * played
+    points = rng.multinomial(team_log['PTS'].to_numpy(), pvals / pvals.sum(axis=1, keepdims=True))
+
+    rows, players = np.nonzero(played)
+    log = team_log.iloc[rows][['SEASON_ID', 'TEAM_ID', 'TEAM_ABBREVIATION', 'TEAM_NAME', 'GAME_ID', 'GAME_DATE',
+                               'MATCHUP', 'WL']].reset_index(drop=True)
+    player_id = 1_000_000 + team[rows] * roster_size + players
+    log.insert(1, 'PLAYER_ID', player_id)
+    log.insert(2, 'PLAYER_NAME', 'Player ' + pd.Series(player_id).astype(str))
+    log['MIN'] = minutes[rows, players].astype(np.int64)
+    log['PTS'] = points[rows, players]
+    log['IS_HOME'] = log['MATCHUP'].str.contains('vs.').astype(int)
+    return log.sort_values(['GAME_DATE', 'GAME_ID'], kind='stable').reset_index(drop=True)
+
+
+def synthetic_games(n_teams=30, n_seasons=6, games_per_team=82, last_season=2024, seed=0):
+    # One row per game with _home/_away columns, i.e. the shape of data/nba_games_2019_2025.csv
+    return merge_team_log(synthetic_league_log(n_teams, n_seasons, games_per_team, last_season, seed))
@@ -0,0 +1,182 @@
+import pandas as pd
+import numpy as np
+import os
+
+from src.data_engineering import estimate_possessions, valid_game_mask
+from src.elo_model import EloState, run_elo
+from src.rolling_stats import ROLL_WINDOW, ROLL_DEFAULTS
+
+# Order of the rolling ring buffers
+ROLL_STATS = ['PTS', 'PACE', 'WIN']
+
+
+class TeamStateStore:
+    # Live per-team state (Elo ratings, rolling windows, last game date) that can take
+    # one finished game at a time, so in-season updates don't need a full rebuild.
+    def __init__(self, k_factor=0.15, reversion=0.01, base_elo=1000, window=ROLL_WINDOW):
+        self.k_factor = k_factor
+        self.reversion = reversion
+        self.window = window
+        self.elo = EloState(base_elo)
+
+        # Rolling ring buffers per team: (team, stat, slot)
+        self.roll = np.zeros((0, len(ROLL_STATS), window))
+        self.roll_count = np.zeros(0, dtype=np.int64)
+        self.roll_pos = np.zeros(0, dtype=np.int64)
+        self.last_date = np.zeros(0, dtype='datetime64[ns]')
+
+    @property
+    def teams(self):
+        return self.elo.teams
+
+    def _team_ids(self, names):
+        ids = self.elo.team_ids(names)
+        grow = len(self.elo.teams) - len(self.roll)
+        if grow > 0:
+            self.roll = np.concatenate([self.roll, np.zeros((grow, len(ROLL_STATS), self.window))])
+            self.roll_count = np.concatenate([self.roll_count, np.zeros(grow, dtype=np.int64)])
+            self.roll_pos = np.concatenate([self.roll_pos, np.zeros(grow, dtype=np.int64)])
+            self.last_date = np.concatenate([self.last_date, np.full(grow, np.datetime64('NaT'), dtype='datetime64[ns]')])
+        return ids
+
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        # Bulk build from a processed, chronologically sorted frame (the output of
+        # load_and_process_data or any later stage)
+        store = cls(**kwargs)
+        home_ids = store._team_ids(df['TEAM_NAME_home'].tolist())
+        away_ids = store._team_ids(df['TEAM_NAME_away'].tolist())
+
+        run_elo(
+            store.elo, home_ids, away_ids,
+            df['OFF_EFF_home_actual'].to_numpy(dtype=np.float64),
+            df['OFF_EFF_away_actual'].to_numpy(dtype=np.float64),
+            df['PACE_actual'].to_numpy(dtype=np.float64),
+            k_factor=store.k_factor, reversion=store.reversion
+        )
+
+        # Stack home and away games, the last `window` games of each team fill its ring buffer
+        n = len(df)
+        pace = df['PACE_actual'].to_numpy(dtype=np.float64)
+        log = pd.DataFrame({
+            'TEAM': np.concatenate([home_ids, away_ids]),
+            'GAME_DATE': pd.to_datetime(pd.concat([df['GAME_DATE'], df['GAME_DATE']], ignore_index=True)),
+            'ORDER': np.concatenate([np.arange(n), np.arange(n)]),
+            'PTS': np.concatenate([df['PTS_home'].to_numpy(dtype=np.float64), df['PTS_away'].to_numpy(dtype=np.float64)]),
+            'PACE': np.concatenate([pace, pace]),
+            'WIN': np.concatenate([(df['WL_home'] == 'W').to_numpy(dtype=np.float64),
+                                   (df['WL_away'] == 'W').to_numpy(dtype=np.float64)]),
+        })
+        log = log.sort_values(['TEAM', 'ORDER'], kind='stable')
+        tail = log.groupby('TEAM').tail(store.window)
+        counts = log.groupby('TEAM').size()
+
+        for team, games in tail.groupby('TEAM'):
+            k = len(games)
+            store.roll[team, :, :k] = games[ROLL_STATS].to_numpy().T
+            store.roll_count[team] = counts[team]
+            store.roll_pos[team] = k % store.window
+            store.last_date[team] = games['GAME_DATE'].iloc[-1].to_datetime64()
+
+        return store
+
+    def ingest(self, game):
+        # Add one finished game (a dict or row with the box-score columns of the
+        # merged LeagueGameLog frame) in O(1). The game is checked before its teams are
+        # registered, so a rejected game leaves no trace in the store.
+        date = pd.Timestamp(game['GAME_DATE']).to_datetime64()
+        names = [game['TEAM_NAME_home'], game['TEAM_NAME_away']]
+        if names[0] == names[1]:
+            raise ValueError(f"A team can't play itself: {names[0]}")
+
+        for name in names:
+            idx = self.teams.get(name)
+            if idx is None or np.isnat(self.last_date[idx]):
+                continue
+            if date < self.last_date[idx]:
+                raise ValueError(f"Game on {pd.Timestamp(date).date()} is older than the stored state. "
+                                 f"Rebuild the store to insert past games.")
+            if date == self.last_date[idx]:
+                raise ValueError(f"{name} already has a game on {pd.Timestamp(date).date()}, duplicate game?")
+
+        poss_home = estimate_possessions(game['FGA_home'], game['FTA_home'], game['OREB_home'], game['TOV_home'])
+        poss_away = estimate_possessions(game['FGA_away'], game['FTA_away'], game['OREB_away'], game['TOV_away'])
+        if poss_home <= 0 or poss_away <= 0:
+            raise ValueError("Invalid box score: possessions must be positive.")
+
+        # Same units as load_and_process_data
+        off_home = game['PTS_home'] / poss_home * 1000
+        off_away = game['PTS_away'] / poss_away * 1000
+        pace = (poss_home + poss_away) / 2 * 10
+        if not valid_game_mask(off_home, off_away, pace):
+            raise ValueError("Invalid box score: efficiency or pace out of range.")
+
+        home, away = (int(idx) for idx in self._team_ids(names))
+
+        run_elo(
+            self.elo, np.array([home]), np.array([away]),
+            np.array([off_home], dtype=np.float64), np.array([off_away], dtype=np.float64),
+            np.array([pace], dtype=np.float64),
+            k_factor=self.k_factor, reversion=self.reversion
+        )
+
+        home_win = game['WL_home'] == 'W' if 'WL_home' in game else game['PTS_home'] > game['PTS_away']
+        self._push_roll(home, (game['PTS_home'], pace, float(home_win)), date)
+        self._push_roll(away, (game['PTS_away'], pace, float(not home_win)), date)
+
+    def _push_roll(self, team, values, date):
+        pos = self.roll_pos[team]
+        self.roll[team, :, pos] = values
+        self.roll_pos[team] = (pos + 1) % self.window
+        self.roll_count[team] += 1
+        self.last_date[team] = date
+
+    def team_entry(self, team):
+        # Same layout as the NBAOracle index entries
+        idx = self.teams[team]
+        off, dfn, pace = self.elo.ratings[idx]
+
+        if self.roll_count[idx] >= self.window:
+            roll = self.roll[idx].mean(axis=1)
+        else:
+            roll = [ROLL_DEFAULTS[stat] for stat in ROLL_STATS]
+
+        return {
+            'GAME_DATE': pd.Timestamp(self.last_date[idx]),
+            'OFF': off, 'DEF': dfn, 'PACE': pace,
+            'ROLL_PTS': roll[0], 'ROLL_PACE': roll[1], 'ROLL_WIN': roll[2],
+        }
+
+    def to_index(self):
+        return {team: self.team_entry(team) for team in self.teams}
+
+    def save(self, path):
+        names = sorted(self.teams, key=self.teams.get)
+        np.savez(
+            path,
+            teams=np.array(names),
+            params=np.array([self.k_factor, self.reversion, self.elo.base_elo, self.window]),
+            ratings=self.elo.ratings, history=self.elo.history, history_sum=self.elo.history_sum,
+            history_meta=np.array([self.elo.history_count, self.elo.history_pos, self.elo.window]),
+            roll=self.roll, roll_count=self.roll_count, roll_pos=self.roll_pos,
+            last_date=self.last_date.astype(np.int64),
+        )
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CRITICAL ERROR: Could not find {path}.")
+
+        with np.load(path) as data:
+            k_factor, reversion, base_elo, window = data['params']
+            store = cls(k_factor=k_factor, reversion=reversion, base_elo=base_elo, window=int(window))
+            store.elo.teams = {name: i for i, name in enumerate(data['teams'].tolist())}
+            store.elo.ratings = data['ratings']
+            store.elo.history = data['history']
+            store.elo.history_sum = data['history_sum']
+            store.elo.history_count, store.elo.history_pos, store.elo.window = (int(v) for v in data['history_meta'])
+            store.roll = data['roll']
+            store.roll_count = data['roll_count']
+            store.roll_pos = data['roll_pos']
+            store.last_date = data['last_date'].astype('datetime64[ns]')
+        return store
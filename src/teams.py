@@ -0,0 +1,69 @@
+# Official three-letter codes (plus a few common variants) of the team names in the data
+TEAM_ABBREVIATIONS = {
+    'Atlanta Hawks': ['ATL'],
+    'Boston Celtics': ['BOS'],
+    'Brooklyn Nets': ['BKN', 'BRK'],
+    'Charlotte Hornets': ['CHA', 'CHO'],
+    'Chicago Bulls': ['CHI'],
+    'Cleveland Cavaliers': ['CLE', 'CAVS'],
+    'Dallas Mavericks': ['DAL', 'MAVS'],
+    'Denver Nuggets': ['DEN'],
+    'Detroit Pistons': ['DET'],
+    'Golden State Warriors': ['GSW', 'GS'],
+    'Houston Rockets': ['HOU'],
+    'Indiana Pacers': ['IND'],
+    'LA Clippers': ['LAC', 'Los Angeles Clippers'],
+    'Los Angeles Lakers': ['LAL', 'LA Lakers'],
+    'Memphis Grizzlies': ['MEM'],
+    'Miami Heat': ['MIA'],
+    'Milwaukee Bucks': ['MIL'],
+    'Minnesota Timberwolves': ['MIN', 'Wolves'],
+    'New Orleans Pelicans': ['NOP', 'NO'],
+    'New York Knicks': ['NYK', 'NY'],
+    'Oklahoma City Thunder': ['OKC'],
+    'Orlando Magic': ['ORL'],
+    'Philadelphia 76ers': ['PHI', 'Sixers'],
+    'Phoenix Suns': ['PHX', 'PHO'],
+    'Portland Trail Blazers': ['POR', 'Blazers'],
+    'Sacramento Kings': ['SAC'],
+    'San Antonio Spurs': ['SAS', 'SA'],
+    'Toronto Raptors': ['TOR'],
+    'Utah Jazz': ['UTA', 'UTAH'],
+    'Washington Wizards': ['WAS', 'WSH'],
+}
+
+# Both LA teams share one city, so neither gets it as an alias
+SAME_CITY = {'la': 'los angeles'}
+
+
+def _normalize(name):
+    return ' '.join(name.lower().replace('.', '').split())
+
+
+def build_alias_map(teams):
+    # lower-case alias -> team name, built once. Every team gets its full name, its codes,
+    # its nickname ('celtics', 'trail blazers') and its city when only one team has that
+    # city ('boston' yes, 'los angeles' no).
+    aliases = {}
+    cities = {}
+    for team in teams:
+        words = team.split()
+        nickname = ' '.join(words[-2:]) if team.endswith('Trail Blazers') else words[-1]
+        city = _normalize(team[:-len(nickname)])
+        cities.setdefault(SAME_CITY.get(city, city), []).append(team)
+        for alias in [team, nickname, *TEAM_ABBREVIATIONS.get(team, [])]:
+            aliases[_normalize(alias)] = team
+
+    for city, city_teams in cities.items():
+        if len(city_teams) == 1:
+            aliases.setdefault(city, city_teams[0])
+    return aliases
+
+
+def resolve_team(name, aliases):
+    # Exact alias first, then a unique substring of a team name (the old interactive matching)
+    key = _normalize(name)
+    if key in aliases:
+        return aliases[key]
+    matches = {team for team in aliases.values() if key and key in team.lower()}
+    return matches.pop() if len(matches) == 1 else None
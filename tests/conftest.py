@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.data_engineering import process_games
+from src.pipeline import feature_pipeline
+from src.schema import read_games
+from src.synthetic import synthetic_games
+
+
+@pytest.fixture(scope='session')
+def league_dir(tmp_path_factory):
+    # Three seasons of a 10-team synthetic league: 600 games, enough for the Elo league
+    # window (1000 ratings) to wrap
+    base_dir = tmp_path_factory.mktemp('league')
+    synthetic_games(n_teams=10, n_seasons=3, games_per_team=40).to_csv(base_dir / 'nba_games_2019_2025.csv',
+                                                                       index=False)
+    return base_dir
+
+
+@pytest.fixture(scope='session')
+def processed(league_dir):
+    # Output of the process_games stage (the Elo input), copy before changing it
+    return process_games(read_games(str(league_dir / 'nba_games_2019_2025.csv')))
+
+
+@pytest.fixture(scope='session')
+def features(league_dir):
+    # The batch feature frame the model is trained on
+    return feature_pipeline(base_dir=str(league_dir)).run(verbose=False)
@@ -0,0 +1,126 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from src.data_scraper import TokenBucket, scrape_raw_data, update_season_log
+from src.synthetic import synthetic_league_log, synthetic_player_log
+
+SEASON = '2024-25'
+
+
+class FakeEndpoint:
+    # Local stand-in for LeagueGameLog: one synthetic season, of which only the games played
+    # by `today` are published. Records every request, `fail` makes a log type error out.
+    def __init__(self):
+        team_log = synthetic_league_log(n_teams=6, n_seasons=1, games_per_team=20, last_season=2024)
+        self.logs = {'T': team_log, 'P': synthetic_player_log(team_log).drop(columns='IS_HOME')}
+        self.today = None
+        self.fail = set()
+        self.requests = []
+
+    def __call__(self, season, kind, date_from=None):
+        self.requests.append((season, kind, date_from))
+        if kind in self.fail:
+            raise ConnectionError('endpoint down')
+        log = self.logs[kind]
+        dates = pd.to_datetime(log['GAME_DATE'])
+        mask = dates <= self.today
+        if date_from is not None:
+            mask &= dates >= pd.Timestamp(date_from)
+        return log[mask].reset_index(drop=True)
+
+    def games(self, until):
+        return int((pd.to_datetime(self.logs['T']['GAME_DATE']) <= pd.Timestamp(until)).sum()) // 2
+
+
+@pytest.fixture
+def endpoint():
+    return FakeEndpoint()
+
+
+def scrape(endpoint, tmp_path, today):
+    endpoint.today = pd.Timestamp(today)
+    endpoint.requests.clear()
+    limiter = TokenBucket(rate=1e9, capacity=10, sleep=lambda seconds: None)
+    return scrape_raw_data([SEASON], fetch=endpoint, limiter=limiter, cache_dir=str(tmp_path / 'raw_cache'),
+                           output_folder=str(tmp_path), today=today)
+
+
+def games_csv(tmp_path):
+    return pd.read_csv(tmp_path / 'nba_games_2019_2025.csv')
+
+
+def test_cold_fetch_writes_everything_published(endpoint, tmp_path):
+    assert scrape(endpoint, tmp_path, '2025-01-15')
+    assert endpoint.requests == [(SEASON, 'T', None), (SEASON, 'P', None)]
+    assert len(games_csv(tmp_path)) == endpoint.games('2025-01-15')
+    players = pd.read_csv(tmp_path / 'nba_players_2019_2025.csv')
+    assert players['GAME_DATE'].is_monotonic_increasing
+
+
+def test_refresh_without_new_games_is_a_no_op(endpoint, tmp_path):
+    scrape(endpoint, tmp_path, '2025-01-15')
+    mtime = os.path.getmtime(tmp_path / 'nba_games_2019_2025.csv')
+
+    assert not scrape(endpoint, tmp_path, '2025-01-15')
+    last_date = pd.to_datetime(games_csv(tmp_path)['GAME_DATE']).max()
+    assert [request[2] for request in endpoint.requests] == [last_date, last_date]
+    assert os.path.getmtime(tmp_path / 'nba_games_2019_2025.csv') == mtime
+
+
+def test_incremental_refresh_fetches_only_new_days(endpoint, tmp_path):
+    scrape(endpoint, tmp_path, '2025-01-15')
+    last_date = pd.to_datetime(games_csv(tmp_path)['GAME_DATE']).max()
+
+    assert scrape(endpoint, tmp_path, '2025-02-15')
+    assert all(request[2] == last_date for request in endpoint.requests)
+    games = games_csv(tmp_path)
+    assert len(games) == endpoint.games('2025-02-15')
+    assert not games['GAME_ID'].duplicated().any()
+
+
+def test_failed_fetch_falls_back_to_the_cache(endpoint, tmp_path):
+    scrape(endpoint, tmp_path, '2025-01-15')
+    rows = len(games_csv(tmp_path))
+
+    # The team endpoint is down while a player row got corrected: the season's team log
+    # comes from the cache instead of disappearing from the CSV
+    endpoint.fail.add('T')
+    endpoint.logs['P'].loc[len(endpoint.logs['P']) // 2, 'PTS'] += 1
+    scrape(endpoint, tmp_path, '2025-01-15')
+    assert len(games_csv(tmp_path)) == rows
+
+    log, changed = update_season_log(SEASON, 'T', endpoint, TokenBucket(sleep=lambda seconds: None),
+                                     str(tmp_path / 'raw_cache'), today='2025-01-15')
+    assert not changed and len(log) == 2 * rows
+
+
+def test_failed_fetch_without_cache_keeps_the_old_csvs(endpoint, tmp_path):
+    scrape(endpoint, tmp_path, '2025-01-15')
+    games = games_csv(tmp_path)
+
+    endpoint.fail.add('T')
+    for name in os.listdir(tmp_path / 'raw_cache'):
+        if name.startswith('T_'):
+            os.remove(tmp_path / 'raw_cache' / name)
+    assert not scrape(endpoint, tmp_path, '2025-02-15')
+    pd.testing.assert_frame_equal(games_csv(tmp_path), games)
+
+
+def test_no_games_anywhere_writes_nothing(endpoint, tmp_path):
+    assert not scrape(endpoint, tmp_path, '2024-10-01')
+    assert not os.path.exists(tmp_path / 'nba_games_2019_2025.csv')
+
+
+def test_closed_season_gets_one_last_fetch(endpoint, tmp_path):
+    # Cached before the end of the season, the rest comes in with the first run after closing
+    scrape(endpoint, tmp_path, '2025-03-01')
+    assert scrape(endpoint, tmp_path, '2025-07-02')
+    assert len(games_csv(tmp_path)) == endpoint.games('2025-07-02')
+
+    assert not scrape(endpoint, tmp_path, '2025-07-03')
+    assert endpoint.requests == []
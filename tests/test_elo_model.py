@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+
+from src.elo_model import LEAGUE_WINDOW, EloState, checkpoint_positions, replay_elo, run_elo
+from src.profiling import RunProfiler
+
+
+def reference_elo(df, k_factor=0.15, reversion=0.01, base_elo=1000):
+    # The original per-row loop: ratings in dicts, league averages as the mean of the last
+    # LEAGUE_WINDOW entries of plain history lists
+    off, dfn, pace = {}, {}, {}
+    history = {'off': [base_elo], 'def': [base_elo], 'pace': [base_elo]}
+    pre = []
+
+    def update(rating, actual, expected, avg):
+        new = (rating + k_factor * (actual - expected)) * (1 - reversion) + avg * reversion
+        return 1000.0 if np.isnan(new) or new > 3000 or new < 0 else new
+
+    for row in df.itertuples(index=False):
+        home, away = row.TEAM_NAME_home, row.TEAM_NAME_away
+        h = off.get(home, base_elo), dfn.get(home, base_elo), pace.get(home, base_elo)
+        a = off.get(away, base_elo), dfn.get(away, base_elo), pace.get(away, base_elo)
+        pre.append(h + a)
+        avg = {name: np.mean(values[-LEAGUE_WINDOW:]) for name, values in history.items()}
+
+        exp_h_off = h[0] + (a[1] - avg['def'])
+        exp_a_off = a[0] + (h[1] - avg['def'])
+        exp_pace = (h[2] + a[2]) / 2
+        off[home] = update(h[0], row.OFF_EFF_home_actual, exp_h_off, avg['off'])
+        dfn[away] = update(a[1], row.OFF_EFF_home_actual, exp_h_off, avg['def'])
+        off[away] = update(a[0], row.OFF_EFF_away_actual, exp_a_off, avg['off'])
+        dfn[home] = update(h[1], row.OFF_EFF_away_actual, exp_a_off, avg['def'])
+        pace[home] = update(h[2], row.PACE_actual, exp_pace, avg['pace'])
+        pace[away] = update(a[2], row.PACE_actual, exp_pace, avg['pace'])
+
+        history['off'] += [off[home], off[away]]
+        history['def'] += [dfn[home], dfn[away]]
+        history['pace'] += [pace[home], pace[away]]
+    return np.array(pre)
+
+
+def full_run(df):
+    state = EloState()
+    pre = run_elo(
+        state, state.team_ids(df['TEAM_NAME_home'].tolist()), state.team_ids(df['TEAM_NAME_away'].tolist()),
+        df['OFF_EFF_home_actual'].to_numpy(dtype=np.float64), df['OFF_EFF_away_actual'].to_numpy(dtype=np.float64),
+        df['PACE_actual'].to_numpy(dtype=np.float64))
+    return pre, state
+
+
+def test_run_elo_matches_reference_loop(processed):
+    assert 2 * len(processed) > LEAGUE_WINDOW
+    pre, _ = full_run(processed)
+    # Running sums instead of a mean per game, equal up to rounding
+    np.testing.assert_allclose(pre, reference_elo(processed), rtol=1e-10)
+
+
+def replay(df, path):
+    # replay_elo from a fresh state, with the number of rows it replayed (None: no replay)
+    state = EloState()
+    with RunProfiler() as profiler:
+        pre = replay_elo(df, str(path), state)
+    rows = [record['rows'] for record in profiler.records if record['stage'] == 'elo_replay']
+    return pre, state, rows[0] if rows else None
+
+
+def assert_same_state(state, expected):
+    for team, slot in expected.teams.items():
+        np.testing.assert_array_equal(state.ratings[state.teams[team]], expected.ratings[slot])
+    np.testing.assert_array_equal(state.history, expected.history)
+    assert (state.history_count, state.history_pos) == (expected.history_count, expected.history_pos)
+
+
+def test_replay_after_a_correction_matches_a_full_run(processed, tmp_path):
+    path = tmp_path / 'elo_checkpoints.npz'
+    replay(processed, path)
+
+    corrected = processed.copy()
+    row = 2 * len(corrected) // 3
+    corrected.loc[row, 'OFF_EFF_home_actual'] += 40
+    pre, state, rows = replay(corrected, path)
+
+    expected, expected_state = full_run(corrected)
+    np.testing.assert_array_equal(pre, expected)
+    assert_same_state(state, expected_state)
+
+    # Only the games from the last weekly checkpoint before the corrected row are replayed
+    positions = checkpoint_positions(corrected['GAME_DATE'].to_numpy())
+    assert rows == len(corrected) - positions[positions <= row].max()
+
+
+def test_replay_after_new_games_matches_a_full_run(processed, tmp_path):
+    path = tmp_path / 'elo_checkpoints.npz'
+    replay(processed.iloc[:-30].reset_index(drop=True), path)
+    pre, state, rows = replay(processed, path)
+
+    expected, expected_state = full_run(processed)
+    np.testing.assert_array_equal(pre, expected)
+    assert_same_state(state, expected_state)
+    assert rows == 30
+
+
+def test_replay_without_changes_skips_the_replay(processed, tmp_path):
+    path = tmp_path / 'elo_checkpoints.npz'
+    first, _, _ = replay(processed, path)
+    mtime = os.path.getmtime(path)
+
+    pre, state, rows = replay(processed, path)
+    assert rows is None
+    np.testing.assert_array_equal(pre, first)
+    assert_same_state(state, full_run(processed)[1])
+    assert os.path.getmtime(path) == mtime
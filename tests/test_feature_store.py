@@ -0,0 +1,41 @@
+import numpy as np
+
+from src.feature_store import FeatureStore, INDEX_FIELDS
+from src.model import FEATURES
+from src.team_state import TeamStateStore
+
+
+def serving_features(store, games):
+    # What NBAOracle.feature_matrix feeds the model for these games, priced on their game day
+    pairs = list(zip(games['TEAM_NAME_home'], games['TEAM_NAME_away']))
+    return store.pair_features(pairs, games['GAME_DATE'].to_numpy())
+
+
+def test_point_in_time_lookups_match_the_batch_features(features):
+    # Every game's lookup on its own day sees only earlier games, exactly like the batch
+    # pipeline's pre-game columns
+    store = FeatureStore.from_frame(features, TeamStateStore.from_frame(features))
+    columns = serving_features(store, features)
+    for feature in FEATURES:
+        np.testing.assert_array_equal(columns[feature].astype(np.float64),
+                                      features[feature].to_numpy(dtype=np.float64), err_msg=feature)
+
+
+def test_ingested_games_match_the_batch_features(features):
+    # Built on the first half, the second half ingested game by game like NBAOracle.ingest_game
+    split = len(features) // 2
+    history = features.iloc[:split]
+    state = TeamStateStore.from_frame(history)
+    store = FeatureStore.from_frame(history, state)
+    for game in features.iloc[split:].to_dict('records'):
+        state.ingest(game)
+        for team in (game['TEAM_NAME_home'], game['TEAM_NAME_away']):
+            entry = state.team_entry(team)
+            store.append(team, entry['GAME_DATE'], [entry[field] for field in INDEX_FIELDS])
+
+    later = features.iloc[split:]
+    columns = serving_features(store, later)
+    for feature in FEATURES:
+        # The batch columns are stored as float32
+        np.testing.assert_allclose(columns[feature].astype(np.float64), later[feature].to_numpy(dtype=np.float64),
+                                   rtol=1e-6, err_msg=feature)
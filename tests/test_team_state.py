@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.team_state import TeamStateStore
+
+
+def assert_same_index(index, expected):
+    assert set(index) == set(expected)
+    for team, entry in expected.items():
+        assert index[team]['GAME_DATE'] == entry['GAME_DATE']
+        for field in ['OFF', 'DEF', 'PACE', 'ROLL_PTS', 'ROLL_PACE', 'ROLL_WIN']:
+            np.testing.assert_allclose(index[team][field], entry[field], rtol=1e-9, err_msg=f'{team} {field}')
+
+
+def test_ingest_one_game_at_a_time_matches_from_frame(processed):
+    split = len(processed) // 2
+    store = TeamStateStore.from_frame(processed.iloc[:split])
+    for game in processed.iloc[split:].to_dict('records'):
+        store.ingest(game)
+
+    assert_same_index(store.to_index(), TeamStateStore.from_frame(processed).to_index())
+
+
+def test_rejected_games_leave_no_trace(processed):
+    store = TeamStateStore.from_frame(processed)
+    game = processed.iloc[-1].to_dict()
+    before = store.to_index()
+
+    rejected = [
+        dict(game, TEAM_NAME_away=game['TEAM_NAME_home']),                 # same team on both sides
+        dict(game, TEAM_NAME_away='Phantom Team'),                         # duplicate day for home
+        dict(game, TEAM_NAME_home='Phantom Team',                          # older than the away team's state
+             GAME_DATE=pd.Timestamp(game['GAME_DATE']) - pd.Timedelta(days=30)),
+        dict(game, TEAM_NAME_away='Phantom Team', GAME_DATE=pd.Timestamp(game['GAME_DATE']) + pd.Timedelta(days=1),
+             TEAM_NAME_home='Other Phantom', FGA_home=0, FTA_home=0, OREB_home=0, TOV_home=0),  # invalid box score
+    ]
+    for bad in rejected:
+        with pytest.raises(ValueError):
+            store.ingest(bad)
+
+    assert 'Phantom Team' not in store.teams and 'Other Phantom' not in store.teams
+    assert len(store.roll) == len(store.elo.ratings) == len(store.teams)
+    assert_same_index(store.to_index(), before)